@@ -1,12 +1,18 @@
+import hashlib
+import json
 import logging
 import os
 import re
 import secrets
-from datetime import timedelta
+import time
+from dataclasses import asdict
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime, timedelta, timezone
 from urllib.parse import urlparse
 
 from dotenv import load_dotenv
 from flask import Flask, jsonify, render_template, request, session
+from psycopg2.extras import execute_batch
 
 # Carregue o .env antes dos módulos que leem variáveis na importação.
 load_dotenv()
@@ -24,16 +30,41 @@ from services.auth import (
     rotate_authenticated_session,
     verify_admin_credentials,
 )
-from services.db import get_conn
-from services.imdb_fallback import buscar_info_imdb_fallback
+from services.db import connection, pool_stats
+from services.extraction import (
+    ExtractionBusyError,
+    ExtractionFailedError,
+    ExtractionTimeoutError,
+    extraction_service,
+)
+from services.fanout import iter_parallel, run_parallel
+from services.http_client import stats as http_stats
+from services.imdb_fallback import IMDbUnavailableError, buscar_info_imdb_fallback
 from services.jdownloader_client import (
     JDownloaderConfigurationError,
     JDownloaderError,
     add_download,
 )
-from services.ok_client import buscar_videos, extrair_link_download, listar_resolucoes
-from services.tmdb_client import buscar_info_tmdb
-from services.video_repository import buscar_videos_bd
+from services.ok_client import (
+    VideoUnavailableError,
+    buscar_videos,
+    extract_cache_stats,
+    extrair_link_download,
+    listar_resolucoes,
+    search_cache_stats,
+    ydl_pool_stats,
+)
+from services.prefetch import prefetcher
+from services.tmdb_client import TMDBUnavailableError, buscar_info_tmdb, cache_stats as tmdb_cache_stats
+from services.video_repository import (
+    InvalidCursorError,
+    buscar_videos_bd,
+    cache_stats as bd_cache_stats,
+    iterar_filmes,
+    validar_cursor,
+)
+from utils import compression
+from utils.concurrency import upstream_limit
 from utils.media import normalize_image_url
 
 app = Flask(__name__)
@@ -60,10 +91,31 @@ app.config.update(
     SESSION_COOKIE_SECURE=(os.environ.get("SESSION_COOKIE_SECURE") or "").strip().lower()
     in {"1", "true", "yes"},
     PERMANENT_SESSION_LIFETIME=timedelta(hours=_positive_int_env("ADMIN_SESSION_HOURS", 12)),
+    # Vale para estáticos sem versão; os versionados (?v=) recebem um ano.
+    SEND_FILE_MAX_AGE_DEFAULT=_positive_int_env("STATIC_MAX_AGE", 3600),
+)
+compression.init_app(app)
+
+INFO_MAX_AGE = _positive_int_env("INFO_MAX_AGE", 86400)
+# Por quanto tempo um vídeo sem resultado no TMDB/IMDb não é consultado de novo.
+INFO_NOT_FOUND_TTL = _positive_int_env("INFO_NOT_FOUND_TTL", 3 * 86400)
+# /info/batch: tamanho máximo do lote, consultas simultâneas ao TMDB/IMDb
+# (compartilhadas por todas as requisições do processo) e prazo do lote.
+INFO_BATCH_MAX = _positive_int_env("INFO_BATCH_MAX", 24)
+INFO_BATCH_TIMEOUT = _positive_int_env("INFO_BATCH_TIMEOUT", 10)
+_info_executor = ThreadPoolExecutor(
+    max_workers=upstream_limit("INFO_BATCH_WORKERS", 4), thread_name_prefix="info"
 )
 
 VIDEO_ID_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
 
+# Prazo de cada fonte em /buscar; a que não responder a tempo é omitida e
+# aparece com status "timeout" em "sources".
+SEARCH_TIMEOUTS = {
+    "API": _positive_int_env("SEARCH_TIMEOUT_API", 8),
+    "BD": _positive_int_env("SEARCH_TIMEOUT_BD", 5),
+}
+
 
 def get_cloudflare_beacon_token() -> str | None:
     """Returns Cloudflare Web Analytics beacon token if configured."""
@@ -91,6 +143,43 @@ def get_jdownloader_web_url() -> str | None:
     return url
 
 
+@app.url_defaults
+def versionar_estaticos(endpoint, values):
+    """Acrescenta ?v=<mtime> às URLs de estáticos para permitir cache longo."""
+    if endpoint == "static" and "filename" in values and app.static_folder:
+        try:
+            values["v"] = int(os.stat(os.path.join(app.static_folder, values["filename"])).st_mtime)
+        except OSError:
+            pass
+
+
+@app.after_request
+def cache_estaticos(response):
+    if request.endpoint == "static" and request.args.get("v") and response.status_code in (200, 304):
+        response.cache_control.public = True
+        response.cache_control.max_age = 31536000
+        response.cache_control.immutable = True
+    return response
+
+
+def _resposta_info(data: dict, modificado: datetime | None = None):
+    """
+    Resposta do /info com ETag e Last-Modified; devolve 304 quando o cliente
+    já tem a mesma versão. O campo "cached" não entra no ETag.
+    """
+    response = jsonify(data)
+    if data.get("empty"):
+        response.cache_control.no_cache = True
+        return response
+    conteudo = {k: v for k, v in data.items() if k != "cached"}
+    response.set_etag(hashlib.sha1(json.dumps(conteudo, sort_keys=True, default=str).encode("utf-8")).hexdigest())
+    if modificado:
+        response.last_modified = modificado
+    response.cache_control.public = True
+    response.cache_control.max_age = INFO_MAX_AGE
+    return response.make_conditional(request)
+
+
 @app.route("/")
 def index():
     return render_template(
@@ -156,8 +245,114 @@ def auth_logout():
     return jsonify({"authenticated": False, "csrf_token": logout_session()})
 
 
+def _extracao_indisponivel(exc: Exception):
+    """Resposta para extrações recusadas (fila cheia) ou canceladas por prazo."""
+    if isinstance(exc, ExtractionBusyError):
+        response = jsonify({"error": str(exc), "code": "extraction_busy"})
+        response.status_code = 503
+        response.headers["Retry-After"] = "5"
+        return response
+    return jsonify({"error": str(exc), "code": "extraction_timeout"}), 504
+
+
+def _video_indisponivel(exc: Exception):
+    """O OK.ru informou que o vídeo foi removido ou é privado: não adianta repetir."""
+    return jsonify({"error": str(exc), "code": "video_unavailable"}), 404
+
+
+def _chave_prefetch_api(query: str, offset: int, duration: str, hd_quality: str) -> tuple:
+    return ("API", " ".join(query.lower().split()), offset, duration, hd_quality == "ON")
+
+
+def _chave_prefetch_bd(query: str, faixa: str, ordem: str, cursor: str) -> tuple:
+    return ("BD", " ".join(query.lower().split()), faixa, ordem, cursor)
+
+
+def _agendar_proximas_paginas(query, offset, duration, hd_quality, faixa, ordem, api, bd) -> None:
+    """Aquece o cache com a página seguinte de cada fonte que ainda tem resultados."""
+    if api and api.status == "ok" and api.value["videos"]:
+        proximo = offset + len(api.value["videos"])
+        prefetcher.schedule(
+            _chave_prefetch_api(query, proximo, duration, hd_quality),
+            lambda: buscar_videos(
+                query, proximo, duration, hd_quality, deadline=time.monotonic() + SEARCH_TIMEOUTS["API"]
+            ),
+        )
+    if bd and bd.status == "ok" and bd.value["next_cursor"]:
+        proximo_cursor = bd.value["next_cursor"]
+        prefetcher.schedule(
+            _chave_prefetch_bd(query, faixa, ordem, proximo_cursor),
+            lambda: buscar_videos_bd(query, 0, faixa=faixa, ordem=ordem, cursor=proximo_cursor),
+        )
+
+
+def _resumo_fonte(nome: str, resultado) -> dict:
+    """Situação e resultados de uma fonte, no formato de /buscar."""
+    resumo = resultado.as_dict()
+    if resultado.status != "ok":
+        if resultado.error and not isinstance(resultado.error, InvalidCursorError):
+            logging.error("Erro na busca da fonte %s: %s", nome, resultado.error)
+        return resumo
+    valor = resultado.value
+    resumo.update(count=len(valor["videos"]), videos=valor["videos"], totalCount=valor["totalCount"] or 0)
+    if nome == "BD":
+        resumo.update(approximate=valor["approximate"], next_cursor=valor["next_cursor"], seed=valor["seed"])
+    return resumo
+
+
+def _situacao(resumo: dict) -> dict:
+    return {k: resumo[k] for k in ("status", "elapsed_ms", "count") if k in resumo}
+
+
+def _busca_ndjson(tarefas, agendar):
+    """
+    Uma linha JSON por fonte assim que ela responde ({"type": "source", ...}),
+    já sem os ids enviados em linhas anteriores, e uma linha final
+    {"type": "done", ...} com os totais e a paginação.
+    """
+
+    def gerar():
+        vistos = set()
+        resultados = {}
+        final = {"type": "done", "totalCount": 0, "approximate": False, "next_cursor": None, "seed": None}
+        final["sources"] = situacoes = {}
+        for nome, resultado in iter_parallel(tarefas, SEARCH_TIMEOUTS):
+            resultados[nome] = resultado
+            resumo = _resumo_fonte(nome, resultado)
+            situacoes[nome] = _situacao(resumo)
+            if isinstance(resultado.error, InvalidCursorError):
+                resumo.update(error=str(resultado.error), code="invalid_cursor")
+            if "videos" in resumo:
+                novos = []
+                for video in resumo["videos"]:
+                    if video["id"] not in vistos:
+                        vistos.add(video["id"])
+                        novos.append(video)
+                resumo["videos"] = novos
+                final["totalCount"] += resumo["totalCount"]
+            if nome == "BD" and resultado.status == "ok":
+                final.update(approximate=resumo["approximate"], next_cursor=resumo["next_cursor"], seed=resumo["seed"])
+            yield json.dumps({"type": "source", "source": nome, **resumo}) + "\n"
+
+        yield json.dumps(final) + "\n"
+        if any(r.status == "ok" for r in resultados.values()):
+            agendar(resultados)
+
+    response = app.response_class(gerar(), mimetype="application/x-ndjson")
+    # Sem buffer em proxies (nginx), para cada linha chegar assim que pronta.
+    response.headers["X-Accel-Buffering"] = "no"
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+
 @app.route("/buscar", methods=["POST"])
 def buscar():
+    """
+    Busca na API do OK.ru, no Banco ou nos dois ("AMBOS") em paralelo.
+
+    Com stream=1 (ou Accept: application/x-ndjson) a resposta é NDJSON, com
+    os vídeos de cada fonte enviados assim que ela responde.
+    """
     query = request.form.get("query", "")
     offset = int(request.form.get("offset", 0))
     duration = request.form.get("duration", "")
@@ -165,29 +360,72 @@ def buscar():
     fonte = request.form.get("fonte", "API")
     faixa = request.form.get("duration_bd", "")
     ordem = request.form.get("order_bd", "")
+    cursor = request.form.get("cursor") or None
+    contar = request.form.get("count") == "1"
+    seed = request.form.get("seed") or None
+    stream = request.form.get("stream") == "1" or "application/x-ndjson" in request.headers.get("Accept", "")
+
+    # Um cursor inválido é recusado antes de tudo: no modo stream o status 200
+    # já teria sido enviado quando o Banco falhasse.
+    if cursor and fonte in ["BD", "AMBOS"]:
+        try:
+            validar_cursor(cursor, query, ordem)
+        except InvalidCursorError as exc:
+            return jsonify({"error": str(exc), "code": "invalid_cursor"}), 400
+
+    # "AMBOS" consulta as duas fontes ao mesmo tempo. O offset enviado é o da
+    # API; o Banco pagina pelo cursor.
+    tarefas = {}
+    if fonte in ["API", "AMBOS"]:
+        prefetcher.claim(_chave_prefetch_api(query, offset, duration, hd_quality))
+        # As novas tentativas da API precisam caber no prazo da fonte; depois
+        # dele o resultado seria descartado e só ocuparia o pool.
+        prazo_api = time.monotonic() + SEARCH_TIMEOUTS["API"]
+        tarefas["API"] = lambda: buscar_videos(query, offset, duration, hd_quality, deadline=prazo_api)
+    if fonte in ["BD", "AMBOS"]:
+        if cursor:
+            prefetcher.claim(_chave_prefetch_bd(query, faixa, ordem, cursor))
+        offset_bd = offset if fonte == "BD" else 0
+        tarefas["BD"] = lambda: buscar_videos_bd(
+            query, offset_bd, faixa=faixa, ordem=ordem, cursor=cursor, contar=contar, seed=seed
+        )
 
-    videos = []
-    total_api = 0
-    total_bd = 0
+    def agendar(resultados):
+        _agendar_proximas_paginas(
+            query, offset, duration, hd_quality, faixa, ordem, resultados.get("API"), resultados.get("BD")
+        )
 
-    if fonte in ["API"]:
-        resultado_api = buscar_videos(query, offset, duration, hd_quality)
-        videos.extend(resultado_api["videos"])
-        total_api = resultado_api["totalCount"]
+    if stream:
+        return _busca_ndjson(tarefas, agendar)
 
-    if fonte in ["BD"]:
-        resultado_bd = buscar_videos_bd(query, offset, faixa=faixa, ordem=ordem)
-        videos.extend(resultado_bd["videos"])
-        total_bd = resultado_bd["totalCount"]
+    resultados = run_parallel(tarefas, SEARCH_TIMEOUTS)
+    bd = resultados.get("BD")
+    if bd and isinstance(bd.error, InvalidCursorError):
+        return jsonify({"error": str(bd.error), "code": "invalid_cursor"}), 400
 
+    resumos = {nome: _resumo_fonte(nome, resultado) for nome, resultado in resultados.items()}
     unicos = {}
-    for video in videos:
-        if video["id"] not in unicos:
-            unicos[video["id"]] = video
-
-    videos_unicos = list(unicos.values())
+    for resumo in resumos.values():
+        for video in resumo.get("videos", []):
+            if video["id"] not in unicos:
+                unicos[video["id"]] = video
 
-    return jsonify({"videos": videos_unicos, "totalCount": total_api + total_bd})
+    resumo_bd = resumos.get("BD", {})
+    response = jsonify(
+        {
+            "videos": list(unicos.values()),
+            "totalCount": sum(resumo.get("totalCount", 0) for resumo in resumos.values()),
+            "approximate": resumo_bd.get("approximate", False),
+            "next_cursor": resumo_bd.get("next_cursor"),
+            "seed": resumo_bd.get("seed"),
+            "sources": {nome: _situacao(resumo) for nome, resumo in resumos.items()},
+        }
+    )
+    if resultados and all(resultado.status != "ok" for resultado in resultados.values()):
+        response.status_code = 503
+    else:
+        agendar(resultados)
+    return response
 
 
 @app.route("/download/<video_id>", methods=["GET"])
@@ -199,11 +437,60 @@ def download(video_id):
         if data.get("streaming"):
             return jsonify({"error": "Download direto nao disponivel (apenas streaming HLS/DASH)."}), 404
         return jsonify(data)
+    except (ExtractionBusyError, ExtractionTimeoutError) as exc:
+        logging.warning("Extração de %s indisponível: %s", video_id, exc)
+        return _extracao_indisponivel(exc)
+    except VideoUnavailableError as exc:
+        logging.info("Vídeo %s indisponível no OK.ru: %s", video_id, exc)
+        return _video_indisponivel(exc)
+    except ExtractionFailedError as exc:
+        logging.warning("Extração de %s falhou (%s): %s", video_id, exc.error_type, exc)
+        return jsonify({"error": str(exc), "code": "extraction_failed"}), 502
     except Exception as exc:  # pylint: disable=broad-except
         logging.exception("Erro ao preparar download para %s", video_id)
         return jsonify({"error": str(exc)}), 500
 
 
+@app.route("/admin/metrics", methods=["GET"])
+@require_admin
+def admin_metrics():
+    return jsonify(
+        {
+            "db_pool": pool_stats(),
+            "bd_cache": bd_cache_stats(),
+            "okru_search": search_cache_stats(),
+            "okru_extract": extract_cache_stats(),
+            "extraction": extraction_service.stats(),
+            "tmdb_cache": tmdb_cache_stats(),
+            "http": http_stats(),
+            "prefetch": prefetcher.stats(),
+            # Com processos de extração, o pool do yt-dlp vive neles e não aqui.
+            **({} if extraction_service.workers else {"ytdlp_pool": ydl_pool_stats()}),
+        }
+    )
+
+
+@app.route("/admin/export", methods=["GET"])
+@require_admin
+def admin_export():
+    """
+    Exporta o catálogo (filtrado por query e duration_bd, como a fonte Banco)
+    em NDJSON, uma linha por filme. As linhas vêm de um cursor nomeado, então
+    a memória usada não cresce com o tamanho do catálogo.
+    """
+    filmes = iterar_filmes(request.args.get("query", ""), request.args.get("duration_bd", ""))
+
+    def gerar():
+        for filme in filmes:
+            yield json.dumps(asdict(filme), ensure_ascii=False) + "\n"
+
+    response = app.response_class(gerar(), mimetype="application/x-ndjson")
+    response.headers["Content-Disposition"] = "attachment; filename=filmes.ndjson"
+    response.headers["X-Accel-Buffering"] = "no"
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+
 @app.route("/admin/formats/<video_id>", methods=["GET"])
 @require_admin
 def admin_formats(video_id):
@@ -212,6 +499,15 @@ def admin_formats(video_id):
     try:
         data = listar_resolucoes(video_id)
         return jsonify(data)
+    except (ExtractionBusyError, ExtractionTimeoutError) as exc:
+        logging.warning("Extração de %s indisponível: %s", video_id, exc)
+        return _extracao_indisponivel(exc)
+    except VideoUnavailableError as exc:
+        logging.info("Vídeo %s indisponível no OK.ru: %s", video_id, exc)
+        return _video_indisponivel(exc)
+    except ExtractionFailedError as exc:
+        logging.warning("Extração de %s falhou (%s): %s", video_id, exc.error_type, exc)
+        return jsonify({"error": str(exc), "code": "extraction_failed"}), 502
     except Exception as exc:  # pylint: disable=broad-except
         logging.exception("Erro ao listar resoluções de %s", video_id)
         return jsonify({"error": str(exc), "code": "format_lookup_failed"}), 502
@@ -255,6 +551,15 @@ def admin_jdownloader():
                 "height": media.get("height"),
             }
         )
+    except (ExtractionBusyError, ExtractionTimeoutError) as exc:
+        logging.warning("Extração de %s indisponível: %s", video_id, exc)
+        return _extracao_indisponivel(exc)
+    except VideoUnavailableError as exc:
+        logging.info("Vídeo %s indisponível no OK.ru: %s", video_id, exc)
+        return _video_indisponivel(exc)
+    except ExtractionFailedError as exc:
+        logging.warning("Extração de %s falhou (%s): %s", video_id, exc.error_type, exc)
+        return jsonify({"error": str(exc), "code": "extraction_failed"}), 502
     except JDownloaderConfigurationError as exc:
         logging.warning("MyJDownloader não configurado: %s", exc)
         return jsonify({"error": str(exc), "code": "myjd_not_configured"}), 503
@@ -266,6 +571,142 @@ def admin_jdownloader():
         return jsonify({"error": str(exc), "code": "download_prepare_failed"}), 502
 
 
+SQL_UPSERT_INFO = """
+    INSERT INTO infofilmes (id, id_imdb, titulo, sinopse, imagem, generos, nota, language)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+    ON CONFLICT (id) DO UPDATE SET
+        id_imdb = EXCLUDED.id_imdb,
+        titulo = EXCLUDED.titulo,
+        sinopse = EXCLUDED.sinopse,
+        imagem = EXCLUDED.imagem,
+        generos = EXCLUDED.generos,
+        nota = EXCLUDED.nota,
+        language = EXCLUDED.language,
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+
+SQL_AUSENTES_RECENTES = """
+    SELECT a.id FROM infofilmes_nao_encontrados a
+    JOIN unnest(%s::bigint[], %s::text[]) AS p(id, titulo) ON a.id = p.id AND a.titulo = p.titulo
+    WHERE a.language = %s AND a.checked_at > CURRENT_TIMESTAMP - make_interval(secs => %s)
+"""
+
+SQL_REGISTRA_AUSENTE = """
+    INSERT INTO infofilmes_nao_encontrados (id, language, titulo, checked_at)
+    VALUES (%s, %s, %s, CURRENT_TIMESTAMP)
+    ON CONFLICT (id, language, titulo) DO UPDATE SET checked_at = EXCLUDED.checked_at
+"""
+
+
+def _titulo_normalizado(titulo: str) -> str:
+    return " ".join(titulo.lower().split())
+
+
+def _ausentes_recentes(cur, titulos: dict[int, str], lang: str | None) -> set[str]:
+    """
+    Ids cuja busca pelo mesmo título, no mesmo idioma, não trouxe resultado há
+    menos de INFO_NOT_FOUND_TTL. `titulos` mapeia id -> título da consulta.
+    """
+    if not titulos:
+        return set()
+    ids = list(titulos)
+    nomes = [_titulo_normalizado(titulos[video_id]) for video_id in ids]
+    cur.execute(SQL_AUSENTES_RECENTES, (ids, nomes, lang or "", INFO_NOT_FOUND_TTL))
+    return {str(row[0]) for row in cur.fetchall()}
+
+
+def _registrar_ausentes(titulos: dict[str, str], lang: str | None, origem: str) -> None:
+    """Registra buscas que TMDB e IMDb responderam sem resultado."""
+    linhas = [
+        (int(video_id), lang or "", _titulo_normalizado(titulo))
+        for video_id, titulo in titulos.items()
+        if video_id.isdigit()
+    ]
+    if not linhas:
+        return
+    try:
+        with connection() as conn, conn.cursor() as cur:
+            execute_batch(cur, SQL_REGISTRA_AUSENTE, linhas)
+        logging.info("[%s] not found recorded for %s", origem, [linha[0] for linha in linhas])
+    except Exception as exc:  # pylint: disable=broad-except
+        logging.warning("[%s] not found persist error %s", origem, exc)
+
+
+def _info_da_linha(row) -> dict:
+    return {
+        "id_imdb": row[0],
+        "titulo": row[1],
+        "sinopse": row[2],
+        "imagem": normalize_image_url(row[3]),
+        "generos": row[4],
+        "nota": row[5],
+        "language": row[6],
+    }
+
+
+def _info_serve(info_db: dict | None, lang: str | None) -> bool:
+    """O registro salvo vale para o idioma pedido (ou não tem idioma)."""
+    return bool(info_db) and (not lang or not info_db.get("language") or info_db.get("language") == lang)
+
+
+def _titulo_pendente(titulo: str) -> bool:
+    return not titulo.strip() or "carregando" in titulo.lower()
+
+
+def _consultar_info_externa(titulo: str, lang: str | None) -> dict | None:
+    """
+    TMDB no idioma pedido e, sem resultado, o fallback do IMDb. None significa
+    que os dois responderam sem resultado; se algum falhou e nada foi achado,
+    a falha é relançada (e a ausência não deve ser registrada).
+    """
+    falha = None
+    try:
+        info_api = buscar_info_tmdb(titulo, lang or "")
+    except TMDBUnavailableError as exc:
+        info_api, falha = None, exc
+    if not info_api:
+        try:
+            info_api = buscar_info_imdb_fallback(titulo)
+        except IMDbUnavailableError as exc:
+            falha = falha or exc
+    if not info_api and falha:
+        raise falha
+    return info_api
+
+
+def _montar_info(info_api, info_db, titulo: str, thumb_url: str, lang: str | None) -> dict:
+    data = info_api or info_db
+    if not data:
+        data = {
+            "id_imdb": None,
+            "titulo": titulo or "",
+            "sinopse": "",
+            "imagem": thumb_url,
+            "generos": "",
+            "nota": "",
+            "language": lang,
+            "empty": True,
+        }
+    data["imagem"] = data.get("imagem") or thumb_url
+    data["language"] = lang or data.get("language")
+    data["cached"] = info_api is None and info_db is not None
+    return data
+
+
+def _linha_upsert_info(video_id: str, data: dict) -> tuple:
+    return (
+        video_id,
+        data.get("id_imdb"),
+        data.get("titulo"),
+        data.get("sinopse"),
+        data.get("imagem"),
+        data.get("generos"),
+        data.get("nota"),
+        data.get("language"),
+    )
+
+
 @app.route("/info/<video_id>", methods=["GET"])
 def info(video_id):
     """
@@ -283,119 +724,198 @@ def info(video_id):
     logging.info("[info] req id=%s title='%s' lang='%s'", video_id, titulo_raw, lang)
 
     info_db = None
+    info_db_modificado = None
+    ausente = False
     try:
-        conn = get_conn()
-        cur = conn.cursor()
-        cur.execute(
-            """
-            SELECT id_imdb, titulo, sinopse, imagem, generos, nota, language
-            FROM infofilmes
-            WHERE id = %s
-            """,
-            (video_id,),
-        )
-        row = cur.fetchone()
-        cur.close()
-        conn.close()
-        if row:
-            logging.info("[info] found cache for %s", video_id)
-            info_db = {
-                "id_imdb": row[0],
-                "titulo": row[1],
-                "sinopse": row[2],
-                "imagem": normalize_image_url(row[3]),
-                "generos": row[4],
-                "nota": row[5],
-                "language": row[6],
-            }
+        with connection() as conn, conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT id_imdb, titulo, sinopse, imagem, generos, nota, language, updated_at
+                FROM infofilmes
+                WHERE id = %s
+                """,
+                (video_id,),
+            )
+            row = cur.fetchone()
+            if row:
+                logging.info("[info] found cache for %s", video_id)
+                info_db = _info_da_linha(row)
+                info_db_modificado = row[7]
+            if not _info_serve(info_db, lang) and video_id.isdigit():
+                if _titulo_pendente(titulo_raw):
+                    cur.execute("SELECT nome FROM filmes WHERE id = %s LIMIT 1", (video_id,))
+                    row = cur.fetchone()
+                    if row and row[0]:
+                        titulo_raw = row[0]
+                        logging.info("[info] title fetched from filmes: '%s'", titulo_raw)
+                if titulo_raw.strip():
+                    ausente = bool(_ausentes_recentes(cur, {int(video_id): titulo_raw}, lang))
     except Exception as exc:  # pylint: disable=broad-except
         logging.warning("[info] cache lookup error: %s", exc)
         info_db = None
 
-    if info_db and (not lang or not info_db.get("language") or info_db.get("language") == lang):
+    if _info_serve(info_db, lang):
         info_db["cached"] = True
-        return jsonify(info_db)
+        return _resposta_info(info_db, info_db_modificado)
 
-    if not titulo_raw.strip() or "carregando" in titulo_raw.lower():
-        try:
-            conn = get_conn()
-            cur = conn.cursor()
-            cur.execute("SELECT nome FROM filmes WHERE id = %s LIMIT 1", (video_id,))
-            row = cur.fetchone()
-            cur.close()
-            conn.close()
-            if row and row[0]:
-                titulo_raw = row[0]
-                logging.info("[info] title fetched from filmes: '%s'", titulo_raw)
-        except Exception as exc:  # pylint: disable=broad-except
-            logging.warning("[info] title fetch error: %s", exc)
+    if ausente:
+        logging.info("[info] %s checked recently without results; skipping api", video_id)
+        return _resposta_info(_montar_info(None, info_db, titulo_raw, thumb_url, lang), info_db_modificado)
 
     info_api = None
     if titulo_raw.strip():
-        info_api = buscar_info_tmdb(titulo_raw, lang or "")
-        if not info_api:
-            info_api = buscar_info_imdb_fallback(titulo_raw)
-        logging.info("[info] api result keys=%s", list(info_api.keys()) if info_api else None)
+        try:
+            info_api = _consultar_info_externa(titulo_raw, lang)
+        except (TMDBUnavailableError, IMDbUnavailableError) as exc:
+            logging.warning("[info] api unavailable: %s", exc)
+        else:
+            logging.info("[info] api result keys=%s", list(info_api.keys()) if info_api else None)
+            if not info_api:
+                _registrar_ausentes({video_id: titulo_raw}, lang, "info")
     else:
         logging.info("[info] skipped api call (empty title)")
 
-    data = info_api or info_db
-    if not data:
-        data = {
-            "id_imdb": None,
-            "titulo": titulo_raw or "",
-            "sinopse": "",
-            "imagem": thumb_url,
-            "generos": "",
-            "nota": "",
-            "language": lang,
-            "empty": True,
-        }
-
-    best_image = data.get("imagem") or thumb_url
-    data["imagem"] = best_image
-    data["language"] = lang or data.get("language")
-    data["cached"] = info_api is None and info_db is not None
+    data = _montar_info(info_api, info_db, titulo_raw, thumb_url, lang)
 
     should_persist = bool(info_api) and not data.get("empty")
     if should_persist:
         try:
-            conn = get_conn()
-            cur = conn.cursor()
-            cur.execute(
-                """
-                INSERT INTO infofilmes (id, id_imdb, titulo, sinopse, imagem, generos, nota, language)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                ON CONFLICT (id) DO UPDATE SET
-                    id_imdb = EXCLUDED.id_imdb,
-                    titulo = EXCLUDED.titulo,
-                    sinopse = EXCLUDED.sinopse,
-                    imagem = EXCLUDED.imagem,
-                    generos = EXCLUDED.generos,
-                    nota = EXCLUDED.nota,
-                    language = EXCLUDED.language
-            """,
-                (
-                    video_id,
-                    data.get("id_imdb"),
-                    data.get("titulo"),
-                    data.get("sinopse"),
-                    best_image,
-                    data.get("generos"),
-                    data.get("nota"),
-                    lang or data.get("language"),
-                ),
-            )
-            conn.commit()
-            cur.close()
-            conn.close()
+            with connection() as conn, conn.cursor() as cur:
+                cur.execute(SQL_UPSERT_INFO, _linha_upsert_info(video_id, data))
             logging.info("[info] persisted %s", video_id)
         except Exception as exc:  # pylint: disable=broad-except
             logging.warning("[info] persist error %s", exc)
     else:
         logging.info("[info] nothing to persist (empty or no api/db)")
 
-    return jsonify(data)
+    modificado = datetime.now(timezone.utc) if should_persist else info_db_modificado
+    return _resposta_info(data, modificado)
+
+
+@app.route("/info/batch", methods=["POST"])
+def info_batch():
+    """
+    Metadados de vários vídeos de uma vez, para o front pré-carregar os cards
+    visíveis. Corpo JSON: {"items": [{"id", "title", "thumb"}], "lang"}.
+
+    Os registros salvos saem de uma única consulta; os que faltam (ou estão em
+    outro idioma) são buscados no TMDB/IMDb em paralelo, num pool limitado.
+    Ids cuja consulta não termina dentro de INFO_BATCH_TIMEOUT ficam de fora
+    da resposta e o front recorre ao /info individual.
+    """
+    payload = request.get_json(silent=True) or {}
+    itens = payload.get("items")
+    if not isinstance(itens, list):
+        return jsonify({"error": "items obrigatorio"}), 400
+    if len(itens) > INFO_BATCH_MAX:
+        return jsonify({"error": f"no máximo {INFO_BATCH_MAX} itens por lote"}), 400
+    lang = (str(payload.get("lang") or "")).strip() or None
+
+    pedidos: dict[str, dict] = {}
+    for item in itens:
+        video_id = str(item.get("id") or "") if isinstance(item, dict) else ""
+        if not VIDEO_ID_RE.fullmatch(video_id):
+            return jsonify({"error": "id inválido"}), 400
+        pedidos.setdefault(
+            video_id,
+            {
+                "titulo": str(item.get("title") or ""),
+                "thumb": normalize_image_url(str(item.get("thumb") or "")),
+            },
+        )
+
+    resultado: dict[str, dict] = {}
+    salvos: dict[str, dict] = {}
+    ausentes: set[str] = set()
+    # As tabelas usam id BIGINT; ids não numéricos nunca estão salvos.
+    ids = [int(video_id) for video_id in pedidos if video_id.isdigit()]
+    if ids:
+        pendentes_titulo = [
+            int(video_id)
+            for video_id, pedido in pedidos.items()
+            if video_id.isdigit() and _titulo_pendente(pedido["titulo"])
+        ]
+        try:
+            with connection() as conn, conn.cursor() as cur:
+                cur.execute(
+                    """
+                    SELECT id, id_imdb, titulo, sinopse, imagem, generos, nota, language
+                    FROM infofilmes
+                    WHERE id = ANY(%s)
+                    """,
+                    (ids,),
+                )
+                salvos = {str(row[0]): _info_da_linha(row[1:]) for row in cur.fetchall()}
+                pendentes_titulo = [
+                    video_id for video_id in pendentes_titulo if not _info_serve(salvos.get(str(video_id)), lang)
+                ]
+                if pendentes_titulo:
+                    cur.execute("SELECT id, nome FROM filmes WHERE id = ANY(%s)", (pendentes_titulo,))
+                    for video_id, nome in cur.fetchall():
+                        if nome:
+                            pedidos[str(video_id)]["titulo"] = nome
+                # A ausência vale para o título efetivamente consultado.
+                ausentes = _ausentes_recentes(
+                    cur,
+                    {
+                        i: pedidos[str(i)]["titulo"]
+                        for i in ids
+                        if not _info_serve(salvos.get(str(i)), lang) and pedidos[str(i)]["titulo"].strip()
+                    },
+                    lang,
+                )
+        except Exception as exc:  # pylint: disable=broad-except
+            logging.warning("[info/batch] cache lookup error: %s", exc)
+
+    consultas = {}
+    for video_id, pedido in pedidos.items():
+        info_db = salvos.get(video_id)
+        if _info_serve(info_db, lang):
+            info_db["cached"] = True
+            resultado[video_id] = info_db
+        elif pedido["titulo"].strip() and video_id not in ausentes:
+            consultas[video_id] = _info_executor.submit(_consultar_info_externa, pedido["titulo"], lang)
+        else:
+            resultado[video_id] = _montar_info(None, info_db, pedido["titulo"], pedido["thumb"], lang)
+
+    if consultas:
+        wait(list(consultas.values()), timeout=INFO_BATCH_TIMEOUT)
+    persistir = []
+    nao_encontrados = {}
+    for video_id, future in consultas.items():
+        if not future.done():
+            logging.warning("[info/batch] %s excedeu %ss", video_id, INFO_BATCH_TIMEOUT)
+            continue
+        pedido = pedidos[video_id]
+        try:
+            info_api = future.result()
+        except (TMDBUnavailableError, IMDbUnavailableError) as exc:
+            # Falha de rede/serviço não é ausência: responde vazio sem registrar.
+            logging.warning("[info/batch] api unavailable %s: %s", video_id, exc)
+            resultado[video_id] = _montar_info(None, salvos.get(video_id), pedido["titulo"], pedido["thumb"], lang)
+            continue
+        except Exception as exc:  # pylint: disable=broad-except
+            logging.warning("[info/batch] api error %s: %s", video_id, exc)
+            continue
+        data = _montar_info(info_api, salvos.get(video_id), pedido["titulo"], pedido["thumb"], lang)
+        resultado[video_id] = data
+        if info_api and not data.get("empty"):
+            persistir.append(_linha_upsert_info(video_id, data))
+        elif not info_api:
+            nao_encontrados[video_id] = pedido["titulo"]
+
+    if persistir:
+        try:
+            with connection() as conn, conn.cursor() as cur:
+                execute_batch(cur, SQL_UPSERT_INFO, persistir)
+            logging.info("[info/batch] persisted %s", len(persistir))
+        except Exception as exc:  # pylint: disable=broad-except
+            logging.warning("[info/batch] persist error %s", exc)
+    _registrar_ausentes(nao_encontrados, lang, "info/batch")
+
+    response = jsonify({"items": resultado})
+    response.cache_control.no_store = True
+    return response
 
 
 if __name__ == "__main__":
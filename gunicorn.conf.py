@@ -10,10 +10,30 @@ def positive_int(name: str, default: int) -> int:
 
 bind = f"0.0.0.0:{positive_int('PORT', 5000)}"
 workers = positive_int("GUNICORN_WORKERS", 1)
-threads = positive_int("GUNICORN_THREADS", 4)
 timeout = positive_int("GUNICORN_TIMEOUT", 300)
+
+# "gthread" (padrão): GUNICORN_THREADS requisições simultâneas por worker.
+# "gevent": cada requisição é uma greenlet; enquanto espera OK.ru, TMDB ou o
+# PostgreSQL ela cede a vez, então um worker atende GUNICORN_WORKER_CONNECTIONS
+# requisições em andamento. Requer os pacotes gevent e psycogreen. Os pools
+# de chamadas externas do app crescem junto (ver utils/concurrency.py).
+worker_class = (os.environ.get("GUNICORN_WORKER_CLASS") or "gthread").strip().lower()
+if worker_class == "gevent":
+    worker_connections = positive_int("GUNICORN_WORKER_CONNECTIONS", 1000)
+else:
+    threads = positive_int("GUNICORN_THREADS", 4)
 graceful_timeout = 30
 keepalive = 5
 accesslog = "-"
 errorlog = "-"
 capture_output = True
+
+
+def post_worker_init(worker):
+    if worker_class == "gevent":
+        # O gunicorn já aplicou o monkey patch do gevent (sockets, threads);
+        # falta tornar o psycopg2 cooperativo.
+        from psycogreen.gevent import patch_psycopg
+
+        patch_psycopg()
+        worker.log.info("gevent: psycopg2 em modo cooperativo.")
@@ -1,5 +1,13 @@
 BEGIN;
 
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE EXTENSION IF NOT EXISTS unaccent;
+
+-- unaccent() é STABLE; o wrapper IMMUTABLE permite usá-lo em índices.
+CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+    AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$;
+
 CREATE TABLE IF NOT EXISTS server (
     id BIGSERIAL PRIMARY KEY,
     server TEXT NOT NULL UNIQUE,
@@ -14,11 +22,36 @@ CREATE TABLE IF NOT EXISTS filmes (
     imagem TEXT,
     idserver BIGINT REFERENCES server(id) ON DELETE SET NULL,
     ordernum INTEGER,
-    created_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    duracao_seg INTEGER,
+    nome_tsv TSVECTOR GENERATED ALWAYS AS (to_tsvector('simple', f_unaccent(nome))) STORED
 );
 
+-- Bancos criados antes da coluna: preencha com scraping/backfill_duracao.py.
+ALTER TABLE filmes ADD COLUMN IF NOT EXISTS duracao_seg INTEGER;
+-- Colunas geradas são calculadas para as linhas existentes ao serem adicionadas.
+ALTER TABLE filmes ADD COLUMN IF NOT EXISTS nome_tsv TSVECTOR
+    GENERATED ALWAYS AS (to_tsvector('simple', f_unaccent(nome))) STORED;
+
 CREATE INDEX IF NOT EXISTS idx_filmes_idserver ON filmes (idserver);
 CREATE INDEX IF NOT EXISTS idx_filmes_created_at ON filmes (created_at DESC);
+-- Ordenação e paginação por cursor da fonte Banco (ver services/video_repository.py).
+CREATE INDEX IF NOT EXISTS idx_filmes_duracao_seg ON filmes (duracao_seg, id);
+CREATE INDEX IF NOT EXISTS idx_filmes_duracao_seg_desc ON filmes (duracao_seg DESC NULLS LAST, id DESC);
+CREATE INDEX IF NOT EXISTS idx_filmes_nome_ordem ON filmes ((LOWER(nome) COLLATE "C"), id);
+-- Busca por substring sem acento (LIKE '%palavra%') e ordenação por similaridade.
+CREATE INDEX IF NOT EXISTS idx_filmes_nome_trgm ON filmes USING gin (lower(f_unaccent(nome)) gin_trgm_ops);
+-- Busca textual com ranking (order_bd=relevancia).
+CREATE INDEX IF NOT EXISTS idx_filmes_nome_tsv ON filmes USING gin (nome_tsv);
+
+-- Incrementada pelos scrapers a cada gravação em filmes; o app usa o valor
+-- para invalidar o cache de buscas da fonte Banco.
+CREATE TABLE IF NOT EXISTS catalogo_versao (
+    id SMALLINT PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+    geracao BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+INSERT INTO catalogo_versao (id) VALUES (1) ON CONFLICT (id) DO NOTHING;
 
 CREATE TABLE IF NOT EXISTS infofilmes (
     id BIGINT PRIMARY KEY,
@@ -28,7 +61,22 @@ CREATE TABLE IF NOT EXISTS infofilmes (
     imagem TEXT,
     generos TEXT,
     nota TEXT,
-    language VARCHAR(16)
+    language VARCHAR(16),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Last-Modified das respostas de /info.
+ALTER TABLE infofilmes ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP;
+
+-- Buscas (vídeo, idioma, título normalizado) para as quais TMDB e IMDb
+-- responderam sem resultado; /info não as repete antes de INFO_NOT_FOUND_TTL
+-- segundos desde checked_at.
+CREATE TABLE IF NOT EXISTS infofilmes_nao_encontrados (
+    id BIGINT NOT NULL,
+    language TEXT NOT NULL DEFAULT '',
+    titulo TEXT NOT NULL,
+    checked_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, language, titulo)
 );
 
 COMMIT;
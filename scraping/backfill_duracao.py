@@ -0,0 +1,97 @@
+import os
+import time
+
+from psycopg2 import InterfaceError, OperationalError
+from psycopg2.extras import execute_values
+
+from get_filmes_requests import ARTIFACTS_DIR, bump_geracao, close_db, ensure_db
+from utils.media import tempo_para_segundos
+
+BATCH_SIZE = int(os.environ.get("OKRU_BACKFILL_BATCH", "5000"))
+CHECKPOINT_FILE = ARTIFACTS_DIR / "backfill_duracao.checkpoint"
+
+SQL_UPDATE = """
+    UPDATE filmes AS f
+    SET duracao_seg = v.duracao_seg
+    FROM (VALUES %s) AS v (id, duracao_seg)
+    WHERE f.id = v.id
+"""
+
+
+def _read_checkpoint() -> int:
+    try:
+        return int(CHECKPOINT_FILE.read_text(encoding="utf-8").strip() or "0")
+    except (OSError, ValueError):
+        return 0
+
+
+def _write_checkpoint(last_id: int) -> None:
+    ARTIFACTS_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = CHECKPOINT_FILE.with_suffix(".tmp")
+    tmp.write_text(str(last_id), encoding="utf-8")
+    os.replace(tmp, CHECKPOINT_FILE)
+
+
+def main():
+    """
+    Preenche filmes.duracao_seg a partir de filmes.tempo em lotes por id.
+    Cada lote é confirmado separadamente e o último id fica salvo em
+    artifacts/backfill_duracao.checkpoint, então a execução pode ser
+    interrompida e retomada a qualquer momento.
+    """
+    started = time.time()
+    last_id = _read_checkpoint()
+    batch_size = max(1, BATCH_SIZE)
+    conn = cursor = None
+    total_read = total_updated = 0
+    print(f"[info] Backfill duracao_seg a partir de id>{last_id} (lote={batch_size})")
+
+    try:
+        while True:
+            try:
+                conn, cursor = ensure_db(conn, cursor)
+                cursor.execute(
+                    """
+                    SELECT id, tempo
+                    FROM filmes
+                    WHERE id > %s AND duracao_seg IS NULL
+                    ORDER BY id
+                    LIMIT %s
+                    """,
+                    (last_id, batch_size),
+                )
+                rows = cursor.fetchall()
+                if not rows:
+                    break
+
+                updates = [(vid, seg) for vid, tempo in rows if (seg := tempo_para_segundos(tempo)) is not None]
+                if updates:
+                    execute_values(
+                        cursor, SQL_UPDATE, updates, template="(%s::bigint, %s::integer)", page_size=len(updates)
+                    )
+                    bump_geracao(cursor)
+                conn.commit()
+            except (OperationalError, InterfaceError) as exc:
+                print(f"[warn] Conexao com banco caiu no lote apos id={last_id}: {exc}")
+                close_db(conn, cursor)
+                conn, cursor = None, None
+                time.sleep(2)
+                continue
+
+            last_id = rows[-1][0]
+            _write_checkpoint(last_id)
+            total_read += len(rows)
+            total_updated += len(updates)
+            print(f"[info] ate id={last_id}: lidos={total_read} atualizados={total_updated}")
+    finally:
+        close_db(conn, cursor)
+
+    CHECKPOINT_FILE.unlink(missing_ok=True)
+    print(
+        f"[info] Backfill concluido: lidos={total_read} atualizados={total_updated} "
+        f"tempo_total={time.time() - started:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
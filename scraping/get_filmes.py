@@ -3,6 +3,7 @@ import datetime
 import psycopg2
 import os
 import json
+import sys
 from pathlib import Path
 from dotenv import load_dotenv
 from psycopg2.extras import execute_batch
@@ -20,6 +21,12 @@ from webdriver_manager.chrome import ChromeDriverManager
 
 load_dotenv()
 BASE_DIR = Path(__file__).resolve().parent
+# Permite importar os utilitários do app ao rodar o script de dentro de scraping/.
+sys.path.insert(0, str(BASE_DIR.parent))
+
+from get_filmes_requests import bump_geracao  # noqa: E402
+from utils.media import tempo_para_segundos  # noqa: E402
+
 ARTIFACTS_DIR = Path(os.environ.get("OKRU_ARTIFACTS_DIR", str(BASE_DIR / "artifacts")))
 
 
@@ -61,15 +68,16 @@ def get_conn():
 
 MAX_TXT = 200
 SQL_INSERT = """
-    INSERT INTO filmes (id, nome, tempo, imagem, idserver, ordernum, created_at)
-    VALUES (%s,%s,%s,%s,%s,%s,%s)
+    INSERT INTO filmes (id, nome, tempo, imagem, idserver, ordernum, created_at, duracao_seg)
+    VALUES (%s,%s,%s,%s,%s,%s,%s,%s)
     ON CONFLICT (id) DO UPDATE SET
-        nome       = EXCLUDED.nome,
-        tempo      = EXCLUDED.tempo,
-        imagem     = EXCLUDED.imagem,
-        idserver   = EXCLUDED.idserver,
-        ordernum   = EXCLUDED.ordernum,
-        created_at = EXCLUDED.created_at
+        nome        = EXCLUDED.nome,
+        tempo       = EXCLUDED.tempo,
+        imagem      = EXCLUDED.imagem,
+        idserver    = EXCLUDED.idserver,
+        ordernum    = EXCLUDED.ordernum,
+        created_at  = EXCLUDED.created_at,
+        duracao_seg = EXCLUDED.duracao_seg
 """
 
 
@@ -490,14 +498,16 @@ def process_visible_videos(driver, idserver, seen_ids):
     for idx, vid in enumerate(raw, start=order_init):
         if vid["id"] and vid["id"] not in seen_ids:
             seen_ids.add(vid["id"])
+            tempo = vid["duration"][:20].strip()
             novos.append((
                 vid["id"],
                 vid["title"][:MAX_TXT].strip().title(),
-                vid["duration"][:20].strip(),
+                tempo,
                 vid["thumb"][:MAX_TXT],
                 idserver,
                 idx,
-                datetime.date.today()
+                datetime.date.today(),
+                tempo_para_segundos(tempo)
             ))
     driver.execute_script("""
         let cards = document.querySelectorAll('.video-card');
@@ -550,6 +560,7 @@ def scroll_and_scrape(driver, perfil_url, idserver, cursor, conn):
         try:
             ensure_connection()
             execute_batch(cursor, SQL_INSERT, novos, page_size=500)
+            bump_geracao(cursor)
             conn.commit()
         except DataError as e:
             if not conn.closed:
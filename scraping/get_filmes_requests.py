@@ -4,6 +4,7 @@ import importlib.util
 import json
 import os
 import re
+import sys
 import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
@@ -18,6 +19,11 @@ from psycopg2 import InterfaceError, OperationalError
 
 load_dotenv()
 BASE_DIR = Path(__file__).resolve().parent
+# Permite importar os utilitários do app ao rodar o script de dentro de scraping/.
+sys.path.insert(0, str(BASE_DIR.parent))
+
+from utils.media import tempo_para_segundos  # noqa: E402
+
 ARTIFACTS_DIR = Path(os.environ.get("OKRU_ARTIFACTS_DIR", str(BASE_DIR / "artifacts")))
 
 
@@ -64,15 +70,16 @@ AUTO_COOKIE_LOGIN_ALLOW_MANUAL = (
 )
 
 SQL_INSERT = """
-    INSERT INTO filmes (id, nome, tempo, imagem, idserver, ordernum, created_at)
+    INSERT INTO filmes (id, nome, tempo, imagem, idserver, ordernum, created_at, duracao_seg)
     VALUES %s
     ON CONFLICT (id) DO UPDATE SET
-        nome       = EXCLUDED.nome,
-        tempo      = EXCLUDED.tempo,
-        imagem     = EXCLUDED.imagem,
-        idserver   = EXCLUDED.idserver,
-        ordernum   = EXCLUDED.ordernum,
-        created_at = EXCLUDED.created_at
+        nome        = EXCLUDED.nome,
+        tempo       = EXCLUDED.tempo,
+        imagem      = EXCLUDED.imagem,
+        idserver    = EXCLUDED.idserver,
+        ordernum    = EXCLUDED.ordernum,
+        created_at  = EXCLUDED.created_at,
+        duracao_seg = EXCLUDED.duracao_seg
 """
 
 
@@ -200,7 +207,7 @@ def get_conn():
     raise last_exc  # type: ignore[misc]
 
 
-def _close_db(conn, cursor):
+def close_db(conn, cursor):
     try:
         if cursor and not cursor.closed:
             cursor.close()
@@ -213,14 +220,14 @@ def _close_db(conn, cursor):
         pass
 
 
-def _ensure_db(conn, cursor):
+def ensure_db(conn, cursor):
     if conn is None or cursor is None:
         conn = get_conn()
         cursor = conn.cursor()
         return conn, cursor
 
     if conn.closed or cursor.closed:
-        _close_db(conn, cursor)
+        close_db(conn, cursor)
         conn = get_conn()
         cursor = conn.cursor()
         return conn, cursor
@@ -228,12 +235,24 @@ def _ensure_db(conn, cursor):
     try:
         cursor.execute("SELECT 1")
     except Exception:  # pylint: disable=broad-except
-        _close_db(conn, cursor)
+        close_db(conn, cursor)
         conn = get_conn()
         cursor = conn.cursor()
     return conn, cursor
 
 
+SQL_BUMP_GERACAO = """
+    INSERT INTO catalogo_versao (id, geracao) VALUES (1, 1)
+    ON CONFLICT (id) DO UPDATE
+    SET geracao = catalogo_versao.geracao + 1, updated_at = CURRENT_TIMESTAMP
+"""
+
+
+def bump_geracao(cursor):
+    """Sinaliza ao app que o catálogo mudou (invalida o cache de buscas)."""
+    cursor.execute(SQL_BUMP_GERACAO)
+
+
 def _clean_text(value: str) -> str:
     if not value:
         return ""
@@ -715,8 +734,10 @@ def _write_rows_with_retry(rows, conn, cursor):
 
         for attempt in range(1, retries + 1):
             try:
-                conn, cursor = _ensure_db(conn, cursor)
+                conn, cursor = ensure_db(conn, cursor)
                 execute_values(cursor, SQL_INSERT, chunk, page_size=len(chunk))
+                if cursor.rowcount != 0:
+                    bump_geracao(cursor)
                 conn.commit()
                 total_written += len(chunk)
                 done = True
@@ -726,7 +747,7 @@ def _write_rows_with_retry(rows, conn, cursor):
                     f"[warn] Conexao com banco caiu ao gravar lote "
                     f"({start + 1}-{start + len(chunk)}): {exc}"
                 )
-                _close_db(conn, cursor)
+                close_db(conn, cursor)
                 conn, cursor = None, None
                 time.sleep(min(5, attempt))
             except Exception:
@@ -759,6 +780,7 @@ def _backup_rows(rows, idserver: int) -> Path:
             "idserver": row[4],
             "ordernum": row[5],
             "created_at": str(row[6]),
+            "duracao_seg": row[7],
         }
         for row in rows
     ]
@@ -855,15 +877,17 @@ def _to_rows(videos: List[Dict[str, str]], idserver: int, offset: int = 0):
     today = datetime.date.today()
     rows = []
     for idx, item in enumerate(videos, start=1 + offset):
+        tempo = (item.get("duration") or "")[:20].strip()
         rows.append(
             (
                 item["id"],
                 (item.get("title") or "")[:MAX_TXT].strip().title(),
-                (item.get("duration") or "")[:20].strip(),
+                tempo,
                 (item.get("thumb") or "")[:MAX_TXT],
                 idserver,
                 idx,
                 today,
+                tempo_para_segundos(tempo),
             )
         )
     return rows
@@ -965,7 +989,7 @@ def main():
 
     try:
         try:
-            conn, cursor = _ensure_db(conn, cursor)
+            conn, cursor = ensure_db(conn, cursor)
             perfis = _load_servers(cursor)
         except OperationalError as exc:
             register_error()
@@ -976,7 +1000,7 @@ def main():
             )
             return
         finally:
-            _close_db(conn, cursor)
+            close_db(conn, cursor)
             conn, cursor = None, None
 
         if not perfis:
@@ -1016,7 +1040,7 @@ def main():
                     page_html = resp.text or ""
                     if resp.status_code == 404 or _is_404(page_html):
                         try:
-                            conn, cursor = _ensure_db(conn, cursor)
+                            conn, cursor = ensure_db(conn, cursor)
                             _mark_server_inactive(cursor, conn, idserver)
                         except Exception as exc:  # pylint: disable=broad-except
                             register_error()
@@ -1126,7 +1150,7 @@ def main():
                     continue
                 finally:
                     # Release DB slot between profiles to reduce chance of hitting max connections.
-                    _close_db(conn, cursor)
+                    close_db(conn, cursor)
                     conn, cursor = None, None
         else:
             normalized_perfis = [(_normalize_profile_video_url(url), sid) for url, sid in perfis]
@@ -1151,7 +1175,7 @@ def main():
                         status = result.get("status")
                         if status == "not_found":
                             try:
-                                conn, cursor = _ensure_db(conn, cursor)
+                                conn, cursor = ensure_db(conn, cursor)
                                 _mark_server_inactive(cursor, conn, idserver)
                             except Exception as exc:  # pylint: disable=broad-except
                                 register_error()
@@ -1211,7 +1235,7 @@ def main():
                             print(f"[warn] Backup salvo em: {backup}")
                         continue
                     finally:
-                        _close_db(conn, cursor)
+                        close_db(conn, cursor)
                         conn, cursor = None, None
     finally:
         elapsed = time.time() - started
@@ -1221,7 +1245,7 @@ def main():
             f"erros={total_errors}, tempo_total={elapsed:.1f}s"
         )
         _write_run_log(total_profiles, total_found, total_saved, total_errors, elapsed)
-        _close_db(conn, cursor)
+        close_db(conn, cursor)
         session.close()
 
 
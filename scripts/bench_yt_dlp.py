@@ -0,0 +1,67 @@
+"""
+Mede o custo de preparar o yt-dlp a cada extração em comparação com o pool
+de instâncias já configuradas de services.ok_client.
+
+    python scripts/bench_yt_dlp.py               # só a preparação (sem rede)
+    python scripts/bench_yt_dlp.py 1234567890    # extrações reais desse vídeo
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import yt_dlp  # noqa: E402
+
+from services import ok_client  # noqa: E402
+
+
+def _medir(fn, repeticoes: int) -> list:
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        fn()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return tempos
+
+
+def _resumo(nome: str, tempos: list) -> None:
+    print(f"{nome:<8} mediana {statistics.median(tempos):8.2f} ms   média {statistics.mean(tempos):8.2f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("video_id", nargs="?", help="faz extrações reais deste vídeo do OK.ru")
+    parser.add_argument("-n", "--repeticoes", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.video_id:
+        url = f"https://ok.ru/video/{args.video_id}"
+
+        def nova():
+            with yt_dlp.YoutubeDL(dict(ok_client.YDL_OPTS)) as ydl:
+                ydl.extract_info(url, download=False)
+
+        def pool():
+            ok_client._extrair_com_yt_dlp(args.video_id)
+
+    else:
+
+        def nova():
+            with yt_dlp.YoutubeDL(dict(ok_client.YDL_OPTS)) as ydl:
+                ydl.get_info_extractor("Odnoklassniki")
+
+        def pool():
+            with ok_client._youtube_dl() as ydl:
+                ydl.get_info_extractor("Odnoklassniki")
+
+    pool()  # aquece o pool
+    _resumo("nova", _medir(nova, args.repeticoes))
+    _resumo("pool", _medir(pool, args.repeticoes))
+    print(ok_client.ydl_pool_stats())
+
+
+if __name__ == "__main__":
+    main()
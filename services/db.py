@@ -1,8 +1,28 @@
+import logging
 import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional, Sequence
+
 import psycopg2
+from psycopg2 import InterfaceError, OperationalError
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+from services.fanout import PER_SOURCE_LIMIT
+from services.prefetch import prefetcher
+from utils.concurrency import gevent_mode
+
+
+def _positive_int_env(name: str, default: int) -> int:
+    try:
+        return max(1, int((os.environ.get(name) or str(default)).strip()))
+    except ValueError:
+        return default
 
 
-def get_conn():
+def _connect():
     return psycopg2.connect(
         host=os.environ.get("DB_HOST"),
         database=os.environ.get("DB_DATABASE"),
@@ -10,3 +30,216 @@ def get_conn():
         password=os.environ.get("DB_PASSWORD"),
         port=os.environ.get("DB_PORT"),
     )
+
+
+class PoolTimeoutError(RuntimeError):
+    """Raised when no pooled connection becomes available in time."""
+
+
+class ConnectionPool:
+    """
+    Pool de conexões thread-safe com verificação de vida no checkout.
+
+    Conexões ociosas há mais de `ping_after` segundos recebem um `SELECT 1`
+    antes de serem entregues; se falharem, são descartadas e substituídas por
+    uma nova sem que o chamador perceba.
+    """
+
+    def __init__(self, maxconn: int, timeout: float = 10.0, ping_after: float = 30.0, connect=_connect):
+        self.maxconn = max(1, maxconn)
+        self.timeout = timeout
+        self.ping_after = ping_after
+        self._connect = connect
+        self._cond = threading.Condition()
+        self._idle: list[tuple[object, float]] = []
+        self._in_use = 0
+        self._waiting = 0
+        self._created = 0
+        self._discarded = 0
+        self._pid = os.getpid()
+
+    def _reset_after_fork(self) -> None:
+        # Conexões herdadas de outro processo (fork do gunicorn) não podem ser
+        # compartilhadas; abandona-as sem fechar o socket do processo pai.
+        if self._pid != os.getpid():
+            self._idle.clear()
+            self._in_use = 0
+            self._waiting = 0
+            self._pid = os.getpid()
+
+    def _is_alive(self, conn, idle_since: float) -> bool:
+        if conn.closed:
+            return False
+        if time.monotonic() - idle_since < self.ping_after:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except Exception:  # pylint: disable=broad-except
+            return False
+
+    def _discard(self, conn) -> None:
+        self._discarded += 1
+        try:
+            if not conn.closed:
+                conn.close()
+        except Exception:  # pylint: disable=broad-except
+            pass
+
+    def getconn(self):
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            self._reset_after_fork()
+            while not self._idle and self._in_use >= self.maxconn:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeoutError("Nenhuma conexão disponível no pool do banco.")
+                self._waiting += 1
+                try:
+                    self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+            self._in_use += 1
+            idle = self._idle.pop() if self._idle else None
+
+        try:
+            if idle is not None:
+                conn, idle_since = idle
+                if self._is_alive(conn, idle_since):
+                    return conn
+                logging.info("db pool: conexão inativa descartada; reconectando.")
+                with self._cond:
+                    self._discard(conn)
+            conn = self._connect()
+            with self._cond:
+                self._created += 1
+            return conn
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+    def putconn(self, conn, broken: bool = False) -> None:
+        with self._cond:
+            self._in_use = max(0, self._in_use - 1)
+            if broken or conn.closed or self._pid != os.getpid():
+                self._discard(conn)
+            else:
+                try:
+                    if conn.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+                        conn.rollback()
+                    self._idle.append((conn, time.monotonic()))
+                except Exception:  # pylint: disable=broad-except
+                    self._discard(conn)
+            self._cond.notify()
+
+    def closeall(self) -> None:
+        with self._cond:
+            for conn, _ in self._idle:
+                self._discard(conn)
+            self._idle.clear()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "size": self.maxconn,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "waiting": self._waiting,
+                "created": self._created,
+                "discarded": self._discarded,
+            }
+
+
+_pool: ConnectionPool | None = None
+_pool_lock = threading.Lock()
+
+
+def _default_pool_size() -> int:
+    """
+    Cada requisição usa no máximo uma conexão por vez; enquanto espera o
+    fan-out, a tarefa BD usa a conexão no lugar dela. Além disso, as threads
+    do prefetch consultam o banco, e tarefas BD que estouraram o prazo seguem
+    rodando (até SEARCH_FANOUT_PER_SOURCE). As threads do /info/batch só
+    chamam TMDB e IMDb por HTTP e não precisam de conexão.
+
+    No modo gevent as requisições não são limitadas por threads; a base é de
+    20 conexões, que também limitam a carga no banco. As tarefas BD atrasadas
+    (até metade de UPSTREAM_CONCURRENCY) não entram na conta: esperam uma
+    conexão livre por até DB_POOL_TIMEOUT, como qualquer requisição.
+    """
+    if gevent_mode():
+        return 20 + prefetcher.workers
+    return _positive_int_env("GUNICORN_THREADS", 4) + prefetcher.workers + PER_SOURCE_LIMIT
+
+
+def get_pool() -> ConnectionPool:
+    """Pool do processo, dimensionado por DB_POOL_SIZE ou pelo padrão acima."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                size = _positive_int_env("DB_POOL_SIZE", _default_pool_size())
+                _pool = ConnectionPool(
+                    size,
+                    timeout=_positive_int_env("DB_POOL_TIMEOUT", 10),
+                    ping_after=_positive_int_env("DB_POOL_PING_AFTER", 30),
+                )
+    return _pool
+
+
+@contextmanager
+def connection():
+    """
+    Empresta uma conexão do pool. Faz commit ao sair normalmente e rollback
+    em caso de erro; conexões com falha de rede são descartadas.
+    """
+    pool = get_pool()
+    conn = pool.getconn()
+    broken = False
+    try:
+        yield conn
+        if not conn.closed:
+            conn.commit()
+    except (OperationalError, InterfaceError):
+        broken = True
+        raise
+    except Exception:
+        if not conn.closed:
+            try:
+                conn.rollback()
+            except Exception:  # pylint: disable=broad-except
+                broken = True
+        raise
+    finally:
+        pool.putconn(conn, broken=broken)
+
+
+def pool_stats() -> dict:
+    return get_pool().stats()
+
+
+def stream_query(
+    sql: str,
+    params: Sequence[Any] = (),
+    itersize: Optional[int] = None,
+    record: Optional[Callable[..., Any]] = None,
+) -> Iterator[Any]:
+    """
+    Executa `sql` num cursor nomeado (server-side) e entrega as linhas aos
+    poucos, buscando `itersize` por vez; a memória usada não depende do
+    tamanho do resultado. Com `record`, cada linha vira `record(*row)`.
+
+    A conexão do pool fica emprestada até o gerador terminar ou ser fechado;
+    ao interromper a iteração antes do fim, chame `.close()` no gerador.
+    """
+    size = itersize or _positive_int_env("DB_STREAM_ITERSIZE", 2000)
+    with connection() as conn:
+        with conn.cursor(name=f"stream_{uuid.uuid4().hex}") as cur:
+            cur.itersize = size
+            cur.execute(sql, tuple(params))
+            for row in cur:
+                yield record(*row) if record else row
@@ -0,0 +1,228 @@
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+from typing import Any, Callable, Optional
+
+
+def _positive_int_env(name: str, default: int) -> int:
+    try:
+        return max(1, int((os.environ.get(name) or str(default)).strip()))
+    except ValueError:
+        return default
+
+
+def _non_negative_int_env(name: str, default: int) -> int:
+    try:
+        return max(0, int((os.environ.get(name) or str(default)).strip()))
+    except ValueError:
+        return default
+
+
+class ExtractionBusyError(RuntimeError):
+    """Todos os processos estão ocupados e a fila de espera está cheia."""
+
+
+class ExtractionTimeoutError(RuntimeError):
+    """A extração passou do prazo; o processo que a executava foi encerrado."""
+
+
+class ExtractionFailedError(RuntimeError):
+    """
+    A função levantou uma exceção no processo de extração. `error_type` é a
+    classe original ("módulo.Nome"), já que a exceção em si nem sempre pode
+    ser serializada de volta.
+    """
+
+    def __init__(self, message: str, error_type: str):
+        super().__init__(message)
+        self.error_type = error_type
+
+    @classmethod
+    def from_exception(cls, exc: BaseException) -> "ExtractionFailedError":
+        return cls(str(exc) or type(exc).__name__, _nome_da_classe(type(exc)))
+
+    def is_a(self, cls: type) -> bool:
+        return self.error_type == _nome_da_classe(cls)
+
+
+def _nome_da_classe(cls: type) -> str:
+    return f"{cls.__module__}.{cls.__qualname__}"
+
+
+def _processo_extrator(conn) -> None:
+    # Ctrl+C no servidor é tratado pelo processo principal.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    while True:
+        try:
+            fn, args = conn.recv()
+        except (EOFError, OSError):
+            return
+        try:
+            conn.send(("ok", fn(*args)))
+        except Exception as exc:  # pylint: disable=broad-except
+            conn.send(("error", (_nome_da_classe(type(exc)), str(exc) or type(exc).__name__)))
+
+
+class _Processo:
+    def __init__(self, ctx):
+        self.conn, filho = ctx.Pipe()
+        self.process = ctx.Process(target=_processo_extrator, args=(filho,), name="extrator", daemon=True)
+        self.process.start()
+        filho.close()
+
+    def encerrar(self) -> None:
+        try:
+            self.conn.close()
+        finally:
+            if self.process.is_alive():
+                self.process.kill()
+            self.process.join(timeout=1)
+
+
+class ExtractionService:
+    """
+    Executa funções pesadas (extrações do yt-dlp) em `workers` processos
+    próprios, fora das threads que atendem as requisições.
+
+    Além dos jobs em execução, até `max_queue` chamadas esperam por um
+    processo livre por no máximo `queue_timeout` segundos; além disso a
+    chamada falha na hora com ExtractionBusyError. Um job que passa de
+    `timeout` segundos tem o processo encerrado (ExtractionTimeoutError), e
+    outro é criado no lugar. Exceções da função chegam como
+    ExtractionFailedError, com a classe original. Com workers=0 a função roda
+    na própria thread e as exceções passam sem conversão.
+
+    `fn` e os argumentos precisam ser serializáveis com pickle (funções de
+    módulo, não lambdas).
+    """
+
+    def __init__(
+        self, workers: int, max_queue: int, timeout: float, queue_timeout: float, start_method: str = "spawn"
+    ):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.queue_timeout = queue_timeout
+        self._ctx = multiprocessing.get_context(start_method)
+        self._admissao = threading.BoundedSemaphore(workers + max_queue) if workers else None
+        # Vagas de processo; None indica uma vaga ainda sem processo iniciado.
+        self._livres: "queue.LifoQueue[Optional[_Processo]]" = queue.LifoQueue()
+        for _ in range(workers):
+            self._livres.put(None)
+        self._lock = threading.Lock()
+        self._counters = {
+            "completed": 0,
+            "failed": 0,
+            "rejected": 0,
+            "timeouts": 0,
+            "restarts": 0,
+            "running": 0,
+            "waiting": 0,
+        }
+        self._wait_ms = {"total": 0.0, "max": 0.0}
+        self._run_ms = {"total": 0.0, "max": 0.0}
+
+    def _count(self, name: str, delta: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += delta
+
+    def _registrar(self, tempos: dict, ms: float) -> None:
+        with self._lock:
+            tempos["total"] += ms
+            tempos["max"] = max(tempos["max"], ms)
+
+    def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        if not self.workers:
+            return fn(*args)
+        if not self._admissao.acquire(blocking=False):
+            self._count("rejected")
+            raise ExtractionBusyError("Muitas extrações em andamento; tente novamente em instantes.")
+        try:
+            return self._executar(fn, args)
+        finally:
+            self._admissao.release()
+
+    def _executar(self, fn: Callable[..., Any], args: tuple) -> Any:
+        started = time.monotonic()
+        self._count("waiting")
+        try:
+            processo = self._livres.get(timeout=self.queue_timeout)
+        except queue.Empty:
+            self._count("rejected")
+            raise ExtractionBusyError("Nenhum processo de extração ficou livre a tempo.") from None
+        finally:
+            self._count("waiting", -1)
+        self._registrar(self._wait_ms, (time.monotonic() - started) * 1000)
+
+        self._count("running")
+        inicio_execucao = time.monotonic()
+        try:
+            if processo is None or not processo.process.is_alive():
+                if processo is not None:
+                    self._count("restarts")
+                    processo.encerrar()
+                processo = _Processo(self._ctx)
+            processo.conn.send((fn, args))
+            if not processo.conn.poll(self.timeout):
+                self._count("timeouts")
+                nome = getattr(fn, "__name__", fn)
+                logging.warning("extração: %s excedeu %.0fs; encerrando o processo", nome, self.timeout)
+                processo.encerrar()
+                processo = None
+                raise ExtractionTimeoutError("A extração demorou demais e foi cancelada.")
+            status, valor = processo.conn.recv()
+        except (EOFError, OSError) as exc:
+            self._count("failed")
+            if processo is not None:
+                processo.encerrar()
+            processo = None
+            raise RuntimeError("O processo de extração terminou inesperadamente.") from exc
+        finally:
+            self._count("running", -1)
+            self._registrar(self._run_ms, (time.monotonic() - inicio_execucao) * 1000)
+            self._livres.put(processo)
+
+        if status != "ok":
+            self._count("failed")
+            error_type, message = valor
+            raise ExtractionFailedError(message, error_type)
+        self._count("completed")
+        return valor
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+            wait_ms, run_ms = dict(self._wait_ms), dict(self._run_ms)
+        atendidos = counters["completed"] + counters["failed"] + counters["timeouts"]
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            **counters,
+            "avg_wait_ms": round(wait_ms["total"] / atendidos, 1) if atendidos else 0.0,
+            "max_wait_ms": round(wait_ms["max"], 1),
+            "avg_run_ms": round(run_ms["total"] / atendidos, 1) if atendidos else 0.0,
+            "max_run_ms": round(run_ms["max"], 1),
+        }
+
+    def shutdown(self) -> None:
+        while True:
+            try:
+                processo = self._livres.get_nowait()
+            except queue.Empty:
+                return
+            if processo is not None:
+                processo.encerrar()
+
+
+# Na Vercel cada função é um processo efêmero; lá a extração roda na thread.
+extraction_service = ExtractionService(
+    workers=_non_negative_int_env("EXTRACTION_WORKERS", 0 if os.environ.get("VERCEL") else 2),
+    max_queue=_non_negative_int_env("EXTRACTION_QUEUE", 4),
+    timeout=_positive_int_env("EXTRACTION_TIMEOUT", 45),
+    queue_timeout=_positive_int_env("EXTRACTION_QUEUE_TIMEOUT", 15),
+    start_method=(os.environ.get("EXTRACTION_START_METHOD") or "spawn").strip(),
+)
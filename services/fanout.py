@@ -0,0 +1,126 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from utils.concurrency import upstream_limit
+
+
+def _positive_int_env(name: str, default: int) -> int:
+    try:
+        return max(1, int((os.environ.get(name) or str(default)).strip()))
+    except ValueError:
+        return default
+
+
+@dataclass
+class SourceResult:
+    status: str  # "ok", "timeout", "busy" ou "error"
+    value: Any = None
+    error: Optional[BaseException] = None
+    elapsed_ms: int = 0
+
+    def as_dict(self) -> dict:
+        return {"status": self.status, "elapsed_ms": self.elapsed_ms}
+
+
+_workers = upstream_limit("SEARCH_FANOUT_WORKERS", 8)
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=_workers, thread_name_prefix="fanout")
+    return _executor
+
+
+# Tarefas que já estouraram o prazo e seguem rodando no pool, por fonte. Só
+# elas contam: buscas saudáveis simultâneas não têm limite além do pool. Uma
+# fonte lenta ocupa no máximo SEARCH_FANOUT_PER_SOURCE threads (padrão: metade
+# do pool) com resultados descartados; acima disso falha na hora com "busy".
+PER_SOURCE_LIMIT = _positive_int_env("SEARCH_FANOUT_PER_SOURCE", max(1, _workers // 2))
+_overdue: Dict[str, int] = {}
+_overdue_lock = threading.Lock()
+
+
+def _overdue_full(name: str) -> bool:
+    with _overdue_lock:
+        return _overdue.get(name, 0) >= PER_SOURCE_LIMIT
+
+
+def _track_overdue(name: str, future: Future) -> None:
+    """Conta a tarefa atrasada até ela terminar."""
+    with _overdue_lock:
+        _overdue[name] = _overdue.get(name, 0) + 1
+
+    def _done(_future: Future) -> None:
+        with _overdue_lock:
+            _overdue[name] -= 1
+
+    future.add_done_callback(_done)
+
+
+def _timed(fn: Callable[[], Any]):
+    started = time.monotonic()
+    value = fn()
+    return value, int((time.monotonic() - started) * 1000)
+
+
+def iter_parallel(
+    tasks: Dict[str, Callable[[], Any]], timeouts: Dict[str, float]
+) -> Iterator[Tuple[str, SourceResult]]:
+    """
+    Executa as tarefas ao mesmo tempo e entrega (nome, resultado) na ordem em
+    que terminam; cada uma espera no máximo o seu prazo, contado a partir do
+    início. A espera total é a da mais lenta (limitada pelo maior prazo), não
+    a soma delas.
+
+    Tarefas que estouram o prazo continuam rodando no pool até terminar, mas o
+    resultado é descartado; exceções viram status "error" sem interromper as
+    demais. Se a fonte já tem SEARCH_FANOUT_PER_SOURCE tarefas atrasadas em
+    andamento, ela nem é iniciada e aparece como "busy". Uma tarefa atrasada
+    que ainda não tinha começado é cancelada e não conta.
+    """
+    started = time.monotonic()
+    executor = _get_executor()
+    pending = {}
+    for name, fn in tasks.items():
+        if _overdue_full(name):
+            logging.warning("fanout: fonte %s com %d tarefas atrasadas; ignorada", name, PER_SOURCE_LIMIT)
+            yield name, SourceResult("busy")
+            continue
+        pending[executor.submit(_timed, fn)] = name
+
+    while pending:
+        next_deadline = min(started + timeouts[name] for name in pending.values())
+        done, _ = wait(pending, timeout=max(0.0, next_deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+        for future in done:
+            name = pending.pop(future)
+            try:
+                value, elapsed_ms = future.result()
+                result = SourceResult("ok", value=value, elapsed_ms=elapsed_ms)
+            except Exception as exc:  # pylint: disable=broad-except
+                result = SourceResult("error", error=exc, elapsed_ms=int((time.monotonic() - started) * 1000))
+            yield name, result
+
+        now = time.monotonic()
+        for future, name in list(pending.items()):
+            if started + timeouts[name] <= now:
+                del pending[future]
+                if not future.cancel():
+                    _track_overdue(name, future)
+                logging.warning("fanout: fonte %s excedeu %.1fs", name, timeouts[name])
+                yield name, SourceResult("timeout", elapsed_ms=int((now - started) * 1000))
+
+
+def run_parallel(tasks: Dict[str, Callable[[], Any]], timeouts: Dict[str, float]) -> Dict[str, SourceResult]:
+    """Como `iter_parallel`, mas espera todas e devolve na ordem de `tasks`."""
+    results = dict(iter_parallel(tasks, timeouts))
+    return {name: results[name] for name in tasks}
@@ -0,0 +1,170 @@
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.concurrency import upstream_limit
+
+
+def _float_env(name: str, default: float) -> float:
+    try:
+        return max(0.0, float((os.environ.get(name) or str(default)).strip()))
+    except ValueError:
+        return default
+
+
+def _positive_int_env(name: str, default: int) -> int:
+    try:
+        return max(1, int((os.environ.get(name) or str(default)).strip()))
+    except ValueError:
+        return default
+
+
+DEFAULT_TIMEOUT: Tuple[float, float] = (
+    _float_env("HTTP_CONNECT_TIMEOUT", 3.05),
+    _float_env("HTTP_READ_TIMEOUT", 10),
+)
+RETRIES = int(_float_env("HTTP_RETRIES", 2))
+BACKOFF = _float_env("HTTP_RETRY_BACKOFF", 0.3)
+RETRY_STATUS = frozenset({502, 503, 504})
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+# Com prazo, só vale repetir se sobrar pelo menos isso para a nova tentativa.
+MIN_ATTEMPT = _float_env("HTTP_MIN_ATTEMPT", 1.0)
+
+Timeout = Union[float, Tuple[float, float], None]
+
+_session: Optional[requests.Session] = None
+_session_pid: Optional[int] = None
+_session_lock = threading.Lock()
+_stats: Dict[str, Dict[str, float]] = {}
+_stats_lock = threading.Lock()
+
+
+def _get_session() -> requests.Session:
+    """
+    Sessão do processo. O urllib3 mantém um pool keep-alive por host, então
+    DNS, TCP e TLS são reaproveitados entre requisições e threads.
+    """
+    global _session, _session_pid
+    if _session is None or _session_pid != os.getpid():
+        with _session_lock:
+            if _session is None or _session_pid != os.getpid():
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=_positive_int_env("HTTP_POOL_HOSTS", 10),
+                    pool_maxsize=upstream_limit("HTTP_POOL_SIZE", 10),
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session, _session_pid = session, os.getpid()
+    return _session
+
+
+def _record(host: str, elapsed: float, error: bool, retry: bool) -> None:
+    with _stats_lock:
+        item = _stats.setdefault(host, {"requests": 0, "errors": 0, "retries": 0, "total_ms": 0.0, "max_ms": 0.0})
+        item["requests"] += 1
+        item["errors"] += int(error)
+        item["retries"] += int(retry)
+        ms = elapsed * 1000
+        item["total_ms"] += ms
+        item["max_ms"] = max(item["max_ms"], ms)
+
+
+def request(
+    method: str,
+    url: str,
+    timeout: Timeout = None,
+    idempotent: Optional[bool] = None,
+    deadline: Optional[float] = None,
+    **kwargs: Any,
+) -> requests.Response:
+    """
+    Faz a requisição pela sessão compartilhada com timeout padrão.
+
+    Chamadas idempotentes (GET/HEAD/OPTIONS, ou `idempotent=True` para um POST
+    que só consulta) são repetidas até HTTP_RETRIES vezes, com backoff
+    exponencial, em falhas de conexão, timeout ou status 502/503/504. A última
+    resposta é devolvida; a última exceção é relançada.
+
+    `deadline` (em time.monotonic()) limita o total: os timeouts de cada
+    tentativa são reduzidos ao tempo restante e não há nova tentativa quando
+    ele não comporta o backoff mais HTTP_MIN_ATTEMPT segundos.
+    """
+    method = method.upper()
+    if idempotent is None:
+        idempotent = method in IDEMPOTENT_METHODS
+    attempts = 1 + (RETRIES if idempotent else 0)
+    host = urlsplit(url).netloc or url
+    session = _get_session()
+
+    attempt = 0
+    while True:
+        started = time.monotonic()
+        attempt_timeout = _timeout_until(timeout or DEFAULT_TIMEOUT, deadline, started)
+        if attempt_timeout is None:
+            raise requests.Timeout(f"prazo esgotado antes de {method} {host}")
+        wait = BACKOFF * (2**attempt)
+        try:
+            response = session.request(method, url, timeout=attempt_timeout, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as exc:
+            retry = _can_retry(attempt, attempts, wait, deadline)
+            _record(host, time.monotonic() - started, error=True, retry=retry)
+            if not retry:
+                raise
+            logging.info("http: %s %s falhou (%s); tentando de novo.", method, host, exc)
+        else:
+            failed = response.status_code >= 500
+            retry = failed and response.status_code in RETRY_STATUS and _can_retry(attempt, attempts, wait, deadline)
+            _record(host, time.monotonic() - started, error=failed, retry=retry)
+            if not retry:
+                return response
+            response.close()
+        time.sleep(wait)
+        attempt += 1
+
+
+def _timeout_until(timeout: Timeout, deadline: Optional[float], now: float) -> Timeout:
+    """Reduz o timeout ao que resta do prazo; None quando o prazo já passou."""
+    if deadline is None:
+        return timeout
+    remaining = deadline - now
+    if remaining <= 0:
+        return None
+    if isinstance(timeout, tuple):
+        return (min(timeout[0], remaining), min(timeout[1], remaining))
+    return min(timeout, remaining)
+
+
+def _can_retry(attempt: int, attempts: int, wait: float, deadline: Optional[float]) -> bool:
+    if attempt >= attempts - 1:
+        return False
+    return deadline is None or deadline - time.monotonic() >= wait + MIN_ATTEMPT
+
+
+def get(url: str, **kwargs: Any) -> requests.Response:
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs: Any) -> requests.Response:
+    return request("POST", url, **kwargs)
+
+
+def stats() -> Dict[str, dict]:
+    """Contadores por host: requisições, erros, repetições e latência."""
+    with _stats_lock:
+        return {
+            host: {
+                "requests": int(item["requests"]),
+                "errors": int(item["errors"]),
+                "retries": int(item["retries"]),
+                "avg_ms": round(item["total_ms"] / item["requests"], 1) if item["requests"] else 0.0,
+                "max_ms": round(item["max_ms"], 1),
+            }
+            for host, item in _stats.items()
+        }
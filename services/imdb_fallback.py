@@ -1,9 +1,13 @@
 import html
-import requests
 
+from services import http_client
 from utils.title_cleaner import generate_candidates
 
 
+class IMDbUnavailableError(RuntimeError):
+    """A API do fallback do IMDb não respondeu a alguma das buscas."""
+
+
 def _safe_image(url: str | None) -> str:
     if not url:
         return ""
@@ -14,7 +18,7 @@ def _safe_image(url: str | None) -> str:
 
 def _do_request(url, params, headers):
     try:
-        return requests.get(url, params=params, headers=headers, timeout=10)
+        return http_client.get(url, params=params, headers=headers)
     except Exception as exc:
         print(f"[imdb-fallback] request error to {url}: {exc}", flush=True)
         return None
@@ -23,11 +27,14 @@ def _do_request(url, params, headers):
 def buscar_info_imdb_fallback(titulo_raw: str):
     """
     Busca na API imdb.iamidiotareyoutoo.com (apenas en-US) como fallback para TMDB.
-    Retorna dict compatível ou None.
+    Retorna dict compatível, ou None quando as buscas responderam sem
+    resultado. Se alguma falhou e nada foi encontrado, levanta
+    IMDbUnavailableError.
     """
     base_url = "https://imdb.iamidiotareyoutoo.com"
     candidates, year = generate_candidates(titulo_raw)
     headers = {"Accept": "application/json", "User-Agent": "Mozilla/5.0"}
+    falhas = 0
 
     for cand in candidates:
         q = cand if not year else f"{cand} {year}"
@@ -37,10 +44,12 @@ def buscar_info_imdb_fallback(titulo_raw: str):
             # tenta http como fallback
             resp_search = _do_request(f"http://imdb.iamidiotareyoutoo.com/search", {"q": q}, headers)
         if not resp_search or resp_search.status_code != 200:
+            falhas += 1
             continue
         try:
             search_data = resp_search.json()
         except Exception:
+            falhas += 1
             continue
 
         imdb_id = None
@@ -89,6 +98,7 @@ def buscar_info_imdb_fallback(titulo_raw: str):
                     "generos": "",
                     "nota": "",
                 }
+            falhas += 1
             continue
 
         try:
@@ -121,4 +131,6 @@ def buscar_info_imdb_fallback(titulo_raw: str):
             "nota": rating,
         }
 
+    if falhas:
+        raise IMDbUnavailableError(f"{falhas} consultas ao fallback do IMDb falharam")
     return None
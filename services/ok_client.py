@@ -1,39 +1,109 @@
+import copy
+import hashlib
 import logging
 import json
 import os
+import queue
+import re
 import tempfile
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+from typing import Any, Dict, List, Optional, Tuple
 
-import requests
 import yt_dlp
+from yt_dlp.cookies import YoutubeDLCookieJar
 
+from services import http_client
+from services.extraction import ExtractionFailedError, extraction_service
+from utils.cache import SingleFlight
+from utils.shared_cache import TieredCache, make_cache, private_cache_dir
 from utils.media import formatar_duracao
 
 SEARCH_URL = "https://ok.ru/web-api/v2/video/fetchSearchResult"
 BASE_DIR = Path(__file__).resolve().parent.parent
 COOKIES_FILE = Path(os.environ.get("OKRU_COOKIES_FILE", str(BASE_DIR / "scraping" / "okru_cookies.json")))
 COOKIE_DOMAINS = ("ok.ru", "okcdn.ru", "mycdn.me")
+# Cookies já convertidos para o formato Netscape, reaproveitados entre
+# extrações, workers e reinícios enquanto o JSON de origem não mudar. Sem
+# OKRU_COOKIEFILE_CACHE o arquivo fica em `private_cache_dir()` (ver
+# `_cookiefile_cache`).
+COOKIEFILE_CACHE: Optional[Path] = (
+    Path(os.environ["OKRU_COOKIEFILE_CACHE"]) if os.environ.get("OKRU_COOKIEFILE_CACHE") else None
+)
+SEARCH_TIMEOUT = float(os.environ.get("OKRU_SEARCH_TIMEOUT") or 15)
+
+
+class VideoUnavailableError(RuntimeError):
+    """O OK.ru informou que o vídeo não existe mais, é privado ou foi bloqueado."""
+
+
+# Mensagens do OK.ru (repassadas pelo yt-dlp) para vídeo removido ou privado.
+# Bloqueio por região, cookies vencidos, rede e mudanças no site não entram:
+# são falhas de extração e podem passar numa nova tentativa.
+_INDISPONIVEL_RE = re.compile(
+    r"has not been found|video not found|has been (?:removed|deleted)|was (?:removed|deleted)"
+    r"|video is private|video is blocked|has been blocked|HTTP Error 404|HTTP Error 410"
+    r"|не найден|удал[её]н|заблокирован",
+    re.IGNORECASE,
+)
+_REGIAO_RE = re.compile(r"region|country|регион|стран", re.IGNORECASE)
+
+
+def _video_removido(mensagem: str) -> bool:
+    return bool(_INDISPONIVEL_RE.search(mensagem)) and not _REGIAO_RE.search(mensagem)
+
+
+# Resultados recentes da busca na API, por (consulta normalizada, offset,
+# duração, hd). Buscas iguais simultâneas fazem uma única requisição.
+_search_cache = make_cache(
+    "okru_search",
+    maxsize=int(os.environ.get("OKRU_SEARCH_CACHE_SIZE") or 512),
+    ttl=float(os.environ.get("OKRU_SEARCH_CACHE_TTL") or 120),
+)
+_search_flight = SingleFlight()
+
+# Extrações do yt-dlp por id de vídeo. As URLs do okcdn são assinadas e
+# expiram; cada entrada vale até a primeira expiração menos a margem, e no
+# máximo OKRU_EXTRACT_CACHE_TTL segundos. Só em memória: URLs assinadas e
+# cabeçalhos de sessão não vão para o backend compartilhado (CACHE_BACKEND).
+EXTRACT_CACHE_MARGIN = float(os.environ.get("OKRU_EXTRACT_CACHE_MARGIN") or 120)
+EXTRACT_CACHE_DEFAULT_TTL = float(os.environ.get("OKRU_EXTRACT_CACHE_DEFAULT_TTL") or 300)
+_extract_cache = TieredCache(
+    "okru_extract",
+    maxsize=int(os.environ.get("OKRU_EXTRACT_CACHE_SIZE") or 256),
+    ttl=float(os.environ.get("OKRU_EXTRACT_CACHE_TTL") or 3600),
+    shared=None,
+)
+_extract_flight = SingleFlight()
+
+
+YDL_OPTS = {
+    "quiet": True,
+    "no_warnings": True,
+    "skip_download": True,
+    "format": "bestvideo+bestaudio/best",
+    "noplaylist": True,
+}
+YDL_MAX_USES = int(os.environ.get("OKRU_YDL_MAX_USES") or 50)
+# Instâncias ociosas de YoutubeDL prontas para a próxima extração.
+_ydl_pool: "queue.LifoQueue[Dict[str, Any]]" = queue.LifoQueue(maxsize=int(os.environ.get("OKRU_YDL_POOL_SIZE") or 4))
+_ydl_stats = {"created": 0, "reused": 0, "discarded": 0}
+_ydl_stats_lock = threading.Lock()
+
+_cookies_lock = threading.Lock()
+_cookies_estado: Dict[str, Any] = {"assinatura": None, "sha1": None, "jar": None}
 
 
 def _safe_cookie_value(value: Any) -> str:
     return str(value).replace("\t", " ").replace("\r", " ").replace("\n", " ")
 
 
-def _build_cookiefile_for_yt_dlp() -> Optional[str]:
-    if not COOKIES_FILE.exists():
-        return None
-    try:
-        raw = json.loads(COOKIES_FILE.read_text(encoding="utf-8"))
-    except Exception as exc:  # pylint: disable=broad-except
-        logging.warning("Falha lendo cookies para yt-dlp em %s: %s", COOKIES_FILE, exc)
-        return None
-
-    if not isinstance(raw, list):
-        return None
-
-    lines = ["# Netscape HTTP Cookie File\n"]
-    loaded = 0
+def _netscape_cookie_lines(raw: List[Any]) -> List[str]:
+    """Converte os cookies do Selenium (JSON) nas linhas do formato Netscape."""
+    lines = []
     for entry in raw:
         if not isinstance(entry, dict):
             continue
@@ -70,21 +140,145 @@ def _build_cookiefile_for_yt_dlp() -> Optional[str]:
             )
             + "\n"
         )
-        loaded += 1
+    return lines
 
-    if loaded == 0:
-        return None
 
-    tmp = tempfile.NamedTemporaryFile(mode="w", encoding="utf-8", suffix=".cookies.txt", delete=False)
-    tmp.writelines(lines)
-    tmp.close()
-    return tmp.name
+def _cookiefile_cache() -> Path:
+    """Caminho do jar convertido; chamar com _cookies_lock."""
+    global COOKIEFILE_CACHE
+    if COOKIEFILE_CACHE is None:
+        try:
+            pasta = private_cache_dir()
+        except OSError as exc:
+            # Ex.: HOME somente leitura (Vercel). O diretório de mkdtemp é 0700
+            # e de nome imprevisível, mas vale só para este processo.
+            logging.info("Sem diretório de cache privado (%s); usando um temporário.", exc)
+            pasta = tempfile.mkdtemp(prefix="ok_api_movie_")
+        COOKIEFILE_CACHE = Path(pasta) / "okru_cookies.txt"
+    return COOKIEFILE_CACHE
+
+
+def _arquivo_privado(path: Path) -> bool:
+    """O arquivo é deste usuário e ninguém mais pode lê-lo ou alterá-lo."""
+    info = path.stat()
+    if hasattr(os, "getuid") and info.st_uid != os.getuid():
+        return False
+    return not info.st_mode & 0o077
+
+
+def _gravar_atomico(path: Path, conteudo: str) -> None:
+    """
+    Grava num temporário do mesmo diretório e troca de uma vez (os.replace).
+    O mkstemp cria o arquivo com permissão 0600, que o replace preserva.
+    """
+    path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            fh.write(conteudo)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _carregar_cookiejar(conteudo: bytes, sha1: str) -> Optional[YoutubeDLCookieJar]:
+    cabecalho = f"# Netscape HTTP Cookie File\n# source-sha1: {sha1}\n"
+    destino = _cookiefile_cache()
+    try:
+        # Um arquivo de outro usuário, ou legível por outros, nunca é reaproveitado.
+        with open(destino, encoding="utf-8") as fh:
+            convertido = _arquivo_privado(destino) and fh.read(len(cabecalho)) == cabecalho
+    except OSError:
+        convertido = False
+
+    try:
+        # Outro worker (ou esta instância antes de reiniciar) já converteu
+        # este mesmo conteúdo: basta carregar o arquivo.
+        if not convertido:
+            raw = json.loads(conteudo.decode("utf-8"))
+            lines = _netscape_cookie_lines(raw) if isinstance(raw, list) else []
+            if not lines:
+                return None
+            _gravar_atomico(destino, cabecalho + "".join(lines))
+        jar = YoutubeDLCookieJar(str(destino))
+        jar.load()
+    except Exception as exc:  # pylint: disable=broad-except
+        logging.warning("Falha preparando cookies para yt-dlp a partir de %s: %s", COOKIES_FILE, exc)
+        return None
+    return jar
 
 
-def buscar_videos(query: str, offset: int, duration: str = "", hd_quality: str = "") -> Dict[str, Any]:
+def _cookiejar_yt_dlp() -> Optional[YoutubeDLCookieJar]:
+    """
+    Cookies do OK.ru já convertidos para o yt-dlp. A conversão só é refeita
+    quando o mtime/tamanho do JSON muda e o conteúdo (sha1) também; o jar
+    devolvido é compartilhado e não deve ser alterado. Uma conversão que
+    falha não é registrada e é tentada de novo na próxima chamada.
+    """
+    try:
+        stat = COOKIES_FILE.stat()
+    except OSError:
+        return None
+    assinatura = (stat.st_mtime_ns, stat.st_size)
+    with _cookies_lock:
+        if _cookies_estado["assinatura"] == assinatura:
+            return _cookies_estado["jar"]
+        try:
+            conteudo = COOKIES_FILE.read_bytes()
+        except OSError as exc:
+            logging.warning("Falha lendo cookies para yt-dlp em %s: %s", COOKIES_FILE, exc)
+            return None
+        sha1 = hashlib.sha1(conteudo).hexdigest()
+        if sha1 != _cookies_estado["sha1"]:
+            jar = _carregar_cookiejar(conteudo, sha1)
+            if jar is None:
+                return None
+            _cookies_estado.update(jar=jar, sha1=sha1)
+        _cookies_estado["assinatura"] = assinatura
+        return _cookies_estado["jar"]
+
+
+def buscar_videos(
+    query: str, offset: int, duration: str = "", hd_quality: str = "", deadline: Optional[float] = None
+) -> Dict[str, Any]:
     """
     Consulta a API do OK.ru para buscar vídeos ou canais.
+
+    Respostas válidas ficam em cache por OKRU_SEARCH_CACHE_TTL segundos; erros
+    da API não são guardados. `deadline` (time.monotonic()) é o prazo do
+    chamador: timeouts e novas tentativas da requisição cabem dentro dele.
     """
+    query = " ".join(query.split())
+    chave = (query.lower(), offset, duration or "", hd_quality == "ON")
+    resultado = _search_cache.get(chave)
+    if resultado is None:
+        resultado = _search_flight.do(
+            chave, lambda: _buscar_e_guardar(chave, query, offset, duration, hd_quality, deadline)
+        )
+    return {**resultado, "videos": [dict(video) for video in resultado["videos"]]}
+
+
+def search_cache_stats() -> dict:
+    return {**_search_cache.stats(), **_search_flight.stats()}
+
+
+def _buscar_e_guardar(
+    chave, query: str, offset: int, duration: str, hd_quality: str, deadline: Optional[float]
+) -> Dict[str, Any]:
+    resultado, cacheavel = _buscar_videos_api(query, offset, duration, hd_quality, deadline)
+    if cacheavel:
+        _search_cache.set(chave, resultado)
+    return resultado
+
+
+def _buscar_videos_api(
+    query: str, offset: int, duration: str, hd_quality: str, deadline: Optional[float] = None
+) -> Tuple[Dict[str, Any], bool]:
+    """Requisição à API; retorna (resultado, pode ir para o cache)."""
     payload = {
         "id": 25,
         "parameters": {
@@ -106,7 +300,8 @@ def buscar_videos(query: str, offset: int, duration: str = "", hd_quality: str =
         payload["parameters"]["filters"]["st.vln"] = duration
 
     logging.debug("OK.ru payload: %s", payload)
-    response = requests.post(
+    # A busca só consulta dados; pode ser repetida com segurança.
+    response = http_client.post(
         SEARCH_URL,
         json=payload,
         headers={
@@ -114,58 +309,173 @@ def buscar_videos(query: str, offset: int, duration: str = "", hd_quality: str =
             "Accept": "application/json, text/plain, */*",
             "Content-Type": "application/json",
         },
+        timeout=(http_client.DEFAULT_TIMEOUT[0], SEARCH_TIMEOUT),
+        idempotent=True,
+        deadline=deadline,
     )
 
     logging.debug("OK.ru status=%s body=%s", response.status_code, response.text[:2000])
     if response.status_code != 200:
-        return {"videos": [], "totalCount": 0}
+        return {"videos": [], "totalCount": 0}, False
 
     try:
         data = response.json()
     except Exception as exc:
         logging.warning("Erro parseando JSON OK.ru: %s", exc)
-        return {"videos": [], "totalCount": 0}
+        return {"videos": [], "totalCount": 0}, False
 
     videos = _extrair_videos(data)
     if videos is not None:
-        return videos
+        return videos, True
 
     canais = _extrair_canais(data)
     if canais is not None:
-        return canais
+        return canais, True
 
     logging.info("Nenhum vídeo ou canal retornado para query '%s'", query)
-    return {"videos": [], "totalCount": 0}
+    return {"videos": [], "totalCount": 0}, True
 
 
 def _extract_video_info(video_id: str) -> Dict[str, Any]:
-    video_url = f"https://ok.ru/video/{video_id}"
-    ydl_opts = {
-        "quiet": True,
-        "no_warnings": True,
-        "skip_download": True,
-        "format": "bestvideo+bestaudio/best",
-        "noplaylist": True,
-    }
+    """
+    Info do yt-dlp (título, formatos e cabeçalhos) do vídeo, reaproveitada
+    enquanto as URLs assinadas ainda forem válidas. Pedidos simultâneos do
+    mesmo vídeo esperam uma única extração; a escolha do formato continua
+    sendo feita por quem chamou.
+    """
+    info = _extract_cache.get(video_id)
+    if info is None:
+        info = _extract_flight.do(video_id, lambda: _extrair_e_guardar(video_id))
+    return info
 
-    cookiefile = _build_cookiefile_for_yt_dlp()
-    if cookiefile:
-        ydl_opts["cookiefile"] = cookiefile
 
+def _extrair_e_guardar(video_id: str) -> Dict[str, Any]:
     try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(video_url, download=False)
-    finally:
-        if cookiefile:
-            try:
-                os.remove(cookiefile)
-            except Exception:  # pylint: disable=broad-except
-                pass
+        info = extraction_service.run(_extrair_info, video_id)
+    except yt_dlp.utils.DownloadError as exc:
+        # Extração na própria thread (EXTRACTION_WORKERS=0): mesmo tratamento
+        # das falhas vindas de um processo de extração.
+        if _video_removido(str(exc)):
+            raise VideoUnavailableError(str(exc)) from exc
+        raise ExtractionFailedError.from_exception(exc) from exc
+    except ExtractionFailedError as exc:
+        if exc.is_a(yt_dlp.utils.DownloadError) and _video_removido(str(exc)):
+            raise VideoUnavailableError(str(exc)) from exc
+        raise
+    ttl = _ttl_extracao(info)
+    if ttl > 0:
+        _extract_cache.set(video_id, info, ttl=ttl)
+    return info
+
+
+def extract_cache_stats() -> dict:
+    return {**_extract_cache.stats(), **_extract_flight.stats()}
+
+
+def _expiracao_url(url: str) -> Optional[float]:
+    """Instante (epoch, em segundos) do parâmetro expires de uma URL assinada."""
+    params = parse_qs(urlparse(url or "").query)
+    valor = (params.get("expires") or params.get("expire") or [None])[0]
+    try:
+        instante = float(valor)
+    except (TypeError, ValueError):
+        return None
+    # O okcdn usa milissegundos.
+    return instante / 1000 if instante > 1e11 else instante
+
+
+def _ttl_extracao(info: Dict[str, Any]) -> float:
+    urls = [fmt.get("url") for fmt in info.get("formats") or []] + [info.get("url")]
+    expiracoes = [exp for exp in map(_expiracao_url, filter(None, urls)) if exp is not None]
+    if not expiracoes:
+        return min(EXTRACT_CACHE_DEFAULT_TTL, _extract_cache.ttl)
+    return min(min(expiracoes) - time.time() - EXTRACT_CACHE_MARGIN, _extract_cache.ttl)
+
+
+def _novo_youtube_dl(jar: Optional[YoutubeDLCookieJar]) -> yt_dlp.YoutubeDL:
+    ydl = yt_dlp.YoutubeDL(dict(YDL_OPTS))
+    # Sem a opção cookiefile o yt-dlp não regrava o arquivo ao fechar; cada
+    # instância recebe cópias, e o jar compartilhado fica intacto.
+    for cookie in jar or ():
+        ydl.cookiejar.set_cookie(copy.copy(cookie))
+    # Instancia o extractor do OK.ru agora, e não na primeira extração.
+    ydl.get_info_extractor("Odnoklassniki")
+    return ydl
+
+
+@contextmanager
+def _youtube_dl():
+    """
+    Empresta um YoutubeDL já configurado do pool. Instâncias voltam ao pool
+    até OKRU_YDL_MAX_USES usos; são descartadas antes disso se a extração
+    falhar ou se os cookies mudarem.
+    """
+    jar = _cookiejar_yt_dlp()
+    entrada = None
+    while entrada is None:
+        try:
+            candidata = _ydl_pool.get_nowait()
+        except queue.Empty:
+            break
+        if candidata["jar"] is jar:
+            entrada = candidata
+        else:
+            _descartar_youtube_dl(candidata)
+    if entrada is None:
+        entrada = {"ydl": _novo_youtube_dl(jar), "jar": jar, "usos": 0}
+        _contar_ydl("created")
+    else:
+        _contar_ydl("reused")
+
+    entrada["usos"] += 1
+    try:
+        yield entrada["ydl"]
+    except BaseException:
+        _descartar_youtube_dl(entrada)
+        raise
+    if entrada["usos"] >= YDL_MAX_USES:
+        _descartar_youtube_dl(entrada)
+        return
+    try:
+        _ydl_pool.put_nowait(entrada)
+    except queue.Full:
+        _descartar_youtube_dl(entrada)
+
+
+def _descartar_youtube_dl(entrada: Dict[str, Any]) -> None:
+    _contar_ydl("discarded")
+    try:
+        entrada["ydl"].close()
+    except Exception:  # pylint: disable=broad-except
+        pass
+
+
+def _contar_ydl(nome: str) -> None:
+    with _ydl_stats_lock:
+        _ydl_stats[nome] += 1
+
+
+def ydl_pool_stats() -> dict:
+    with _ydl_stats_lock:
+        contadores = dict(_ydl_stats)
+    return {**contadores, "idle": _ydl_pool.qsize(), "max_idle": _ydl_pool.maxsize}
+
+
+def _extrair_com_yt_dlp(video_id: str) -> Dict[str, Any]:
+    video_url = f"https://ok.ru/video/{video_id}"
+    with _youtube_dl() as ydl:
+        info = ydl.extract_info(video_url, download=False)
     if not info:
         raise RuntimeError("Nao foi possivel obter info do video.")
     return info
 
 
+def _extrair_info(video_id: str) -> Dict[str, Any]:
+    """Roda no processo de extração; devolve só o que o app usa da info."""
+    info = _extrair_com_yt_dlp(video_id)
+    return {key: info.get(key) for key in ("title", "formats", "http_headers", "url")}
+
+
 def _is_stream_manifest(fmt: Dict[str, Any]) -> bool:
     proto = (fmt.get("protocol") or "").lower()
     ext = (fmt.get("ext") or "").lower()
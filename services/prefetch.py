@@ -0,0 +1,102 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Hashable, Optional
+
+
+def _int_env(name: str, default: int) -> int:
+    try:
+        return max(0, int((os.environ.get(name) or str(default)).strip()))
+    except ValueError:
+        return default
+
+
+class Prefetcher:
+    """
+    Aquece em segundo plano páginas que provavelmente serão pedidas em seguida.
+
+    A função agendada deve gravar o resultado no cache da fonte; aqui só se
+    controla a execução e a contabilidade. Pedidos repetidos para a mesma
+    chave são ignorados e, com `max_pending` tarefas na fila, novos pedidos
+    são descartados em vez de competir com as requisições do usuário.
+
+    Uma chave aquecida que é pedida dentro de `ttl` segundos conta como
+    usada; se expirar antes disso, conta como desperdiçada.
+    """
+
+    def __init__(self, workers: int = 2, max_pending: int = 8, ttl: float = 120.0, max_warm: int = 1024):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self.max_warm = max(1, max_warm)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending: set = set()
+        self._warm: "OrderedDict[Hashable, float]" = OrderedDict()
+        self._counters = {"scheduled": 0, "deduplicated": 0, "dropped": 0, "failed": 0, "used": 0, "wasted": 0}
+
+    def _expire(self, now: float) -> None:
+        while self._warm:
+            key, expires = next(iter(self._warm.items()))
+            if expires > now and len(self._warm) <= self.max_warm:
+                break
+            del self._warm[key]
+            self._counters["wasted"] += 1
+
+    def schedule(self, key: Hashable, fn: Callable[[], Any]) -> bool:
+        if self.workers <= 0:
+            return False
+        with self._lock:
+            self._expire(time.monotonic())
+            if key in self._pending or key in self._warm:
+                self._counters["deduplicated"] += 1
+                return False
+            if len(self._pending) >= self.max_pending:
+                self._counters["dropped"] += 1
+                return False
+            self._pending.add(key)
+            self._counters["scheduled"] += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="prefetch")
+            executor = self._executor
+        executor.submit(self._run, key, fn)
+        return True
+
+    def _run(self, key: Hashable, fn: Callable[[], Any]) -> None:
+        ok = False
+        try:
+            fn()
+            ok = True
+        except Exception as exc:  # pylint: disable=broad-except
+            logging.info("prefetch %s falhou: %s", key[0] if isinstance(key, tuple) else key, exc)
+        with self._lock:
+            self._pending.discard(key)
+            if ok:
+                self._warm[key] = time.monotonic() + self.ttl
+                self._expire(time.monotonic())
+            else:
+                self._counters["failed"] += 1
+
+    def claim(self, key: Hashable) -> bool:
+        """Registra que a chave foi pedida; True se ela tinha sido aquecida."""
+        with self._lock:
+            self._expire(time.monotonic())
+            if self._warm.pop(key, None) is None:
+                return False
+            self._counters["used"] += 1
+            return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._expire(time.monotonic())
+            return {**self._counters, "pending": len(self._pending), "warm": len(self._warm)}
+
+
+prefetcher = Prefetcher(
+    workers=_int_env("SEARCH_PREFETCH_WORKERS", 2),
+    max_pending=_int_env("SEARCH_PREFETCH_QUEUE", 8),
+    ttl=_int_env("SEARCH_PREFETCH_TTL", 120),
+)
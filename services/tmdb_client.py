@@ -2,8 +2,8 @@ import html
 import os
 from typing import Any, Dict, Optional, Tuple
 
-import requests
-
+from services import http_client
+from utils.shared_cache import make_cache
 from utils.title_cleaner import generate_candidates, score_tmdb_result
 
 TMDB_API_KEY = os.environ.get("KEY_API_TMDB")
@@ -12,6 +12,17 @@ TMDB_BASE_URL = "https://api.themoviedb.org/3"
 TMDB_IMAGE_BASE = "https://image.tmdb.org/t/p/w500"
 
 
+class TMDBUnavailableError(RuntimeError):
+    """O TMDB não pôde ser consultado (rede, status de erro ou credenciais ausentes)."""
+
+
+_info_cache = make_cache(
+    "tmdb_info",
+    maxsize=int(os.environ.get("TMDB_CACHE_SIZE") or 1024),
+    ttl=float(os.environ.get("TMDB_CACHE_TTL") or 86400),
+)
+
+
 def _tmdb_request(path: str, params: dict | None, lang: str | None):
     params = params or {}
     headers = {"Accept": "application/json"}
@@ -22,12 +33,16 @@ def _tmdb_request(path: str, params: dict | None, lang: str | None):
     if lang:
         params["language"] = lang
     try:
-        return requests.get(f"{TMDB_BASE_URL}{path}", params=params, headers=headers, timeout=10)
+        return http_client.get(f"{TMDB_BASE_URL}{path}", params=params, headers=headers)
     except Exception as exc:
         print(f"[tmdb] request error to {path}: {exc}", flush=True)
         return None
 
 
+def cache_stats() -> dict:
+    return _info_cache.stats()
+
+
 def _tmdb_image_url(path: str | None):
     if not path:
         return ""
@@ -61,18 +76,35 @@ def _fetch_detail(media_type: str, tmdb_id: Any, preferred_lang: str | None):
 
 
 def buscar_info_tmdb(raw_title: str, lang: str = "") -> Optional[Dict[str, Any]]:
-    """Busca TMDB com candidatos (guessit + heurística) e pontua melhor resultado."""
+    """
+    Busca TMDB com candidatos (guessit + heurística) e pontua melhor resultado.
+    Resultados encontrados ficam em cache por TMDB_CACHE_TTL segundos.
+
+    Retorna None só quando as buscas responderam e nada foi encontrado; se
+    alguma falhou e não houve resultado, levanta TMDBUnavailableError.
+    """
+    chave = (" ".join(raw_title.lower().split()), _normalize_lang((lang or "").strip() or None))
+    info = _info_cache.get(chave)
+    if info is None:
+        info = _buscar_info_tmdb(raw_title, lang)
+        if info:
+            _info_cache.set(chave, info)
+    return dict(info) if info else None
+
+
+def _buscar_info_tmdb(raw_title: str, lang: str = "") -> Optional[Dict[str, Any]]:
     if not (TMDB_API_KEY or TMDB_BEARER_TOKEN):
         print("[tmdb] credenciais ausentes (KEY_API_TMDB/TOKEN_API_TMDB)", flush=True)
-        return None
+        raise TMDBUnavailableError("credenciais do TMDB ausentes")
 
     candidates, year = generate_candidates(raw_title)
     lang = _normalize_lang((lang or "").strip() or None)
 
     best_item: Tuple[Dict[str, Any], str, float] | None = None
+    falhas = 0
 
     def run_search(lang_code: str | None, label: str, include_year: bool = True):
-        nonlocal best_item
+        nonlocal best_item, falhas
         for cand in candidates:
             search_params = {"query": cand, "include_adult": "false"}
             if include_year and year:
@@ -83,12 +115,14 @@ def buscar_info_tmdb(raw_title: str, lang: str = "") -> Optional[Dict[str, Any]]
             if not resp or resp.status_code != 200:
                 if resp:
                     print(f"[tmdb] search status={resp.status_code} body={resp.text[:400]}", flush=True)
+                falhas += 1
                 continue
 
             try:
                 results = resp.json().get("results") or []
             except Exception as exc:
                 print(f"[tmdb] search parse error: {exc} body={resp.text[:400]}", flush=True)
+                falhas += 1
                 continue
 
             for item in results:
@@ -111,6 +145,8 @@ def buscar_info_tmdb(raw_title: str, lang: str = "") -> Optional[Dict[str, Any]]
 
     if not best_item:
         print("[tmdb] no candidate found", flush=True)
+        if falhas:
+            raise TMDBUnavailableError(f"{falhas} buscas no TMDB falharam")
         return None
 
     item, media_type, _ = best_item
@@ -122,7 +158,7 @@ def buscar_info_tmdb(raw_title: str, lang: str = "") -> Optional[Dict[str, Any]]
     if not detail and lang:
         detail = _fetch_detail(media_type, tmdb_id, None)
     if not detail:
-        return None
+        raise TMDBUnavailableError(f"detalhes de {media_type}/{tmdb_id} indisponíveis")
 
     imdb_id = detail.get("imdb_id") or detail.get("external_ids", {}).get("imdb_id")
     titulo = detail.get("title") or detail.get("name") or item.get("title") or item.get("name") or raw_title
@@ -1,9 +1,26 @@
+import base64
+import binascii
+import json
 import logging
-import random
-from typing import Dict, List, Tuple
+import os
+import secrets
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from psycopg2 import Error as DatabaseError
+
+from services.db import connection, stream_query
+from utils.cache import TTLCache
+from utils.shared_cache import make_cache
+from utils.media import normalize_image_url
+
+
+def _positive_int_env(name: str, default: int) -> int:
+    try:
+        return max(1, int((os.environ.get(name) or str(default)).strip()))
+    except ValueError:
+        return default
 
-from services.db import get_conn
-from utils.media import tempo_para_minutos, normalize_image_url
 
 FAIXAS_MINUTOS: Dict[str, Tuple[int, int]] = {
     "0-20": (0, 20),
@@ -15,76 +32,369 @@ FAIXAS_MINUTOS: Dict[str, Tuple[int, int]] = {
     "201+": (201, 10**9),
 }
 
+# Mesma expressão do índice GIN idx_filmes_nome_trgm (schema.sql); só assim
+# os LIKE '%palavra%' e a similaridade podem usar o índice de trigramas.
+NOME_NORMALIZADO = "lower(f_unaccent(nome))"
+
+# Consulta no formato de busca web ("frase exata", -excluir, or) sobre a coluna
+# gerada nome_tsv, indexada por idx_filmes_nome_tsv.
+TSQUERY = "websearch_to_tsquery('simple', f_unaccent(%s))"
+
+# COLLATE "C" reproduz a ordenação por code point de str.lower() no Python e
+# coincide com idx_filmes_nome_ordem.
+NOME_ORDEM = 'LOWER(nome) COLLATE "C"'
+
+
+# Até este número de linhas o total é exato; acima dele vale a estimativa do
+# planejador e a resposta sai com approximate=True.
+COUNT_EXACT_LIMIT = _positive_int_env("BD_COUNT_EXACT_LIMIT", 10000)
+_count_cache = make_cache(
+    "bd_count",
+    maxsize=_positive_int_env("BD_COUNT_CACHE_SIZE", 512),
+    ttl=_positive_int_env("BD_COUNT_CACHE_TTL", 300),
+)
+
+# Páginas de resultado já montadas. As entradas levam a geração do catálogo
+# (catalogo_versao, incrementada pelos scrapers) na chave, então uma gravação
+# nova torna todas obsoletas de uma vez; o TTL só limita a memória ociosa.
+_page_cache = make_cache(
+    "bd_page",
+    maxsize=_positive_int_env("BD_PAGE_CACHE_SIZE", 1024),
+    ttl=_positive_int_env("BD_PAGE_CACHE_TTL", 600),
+)
+# A geração é relida no máximo a cada BD_GENERATION_CHECK segundos.
+_geracao_cache = TTLCache(maxsize=1, ttl=_positive_int_env("BD_GENERATION_CHECK", 5))
+
 
-def buscar_videos_bd(query: str, offset: int = 0, limit: int = 20, faixa: str = "", ordem: str = "nome_asc"):
+@dataclass(frozen=True)
+class Filme:
+    id: int
+    nome: str
+    tempo: Optional[str]
+    imagem: Optional[str]
+    duracao_seg: Optional[int]
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor is malformed or belongs to another order."""
+
+
+def _escape_like(palavra: str) -> str:
+    return palavra.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _ordenacao(ordem: str, query: str, semente: int) -> Tuple[str, str, List[Any], bool, bool]:
     """
-    Busca vídeos no banco aplicando filtros, ordenação e paginação.
+    Resolve `ordem` em (nome efetivo, expressão da chave, parâmetros da chave,
+    decrescente, chave pode ser NULL). A chave é sempre desempatada por id no
+    mesmo sentido, o que permite paginação por cursor com comparação de tuplas.
     """
-    conn = get_conn()
-    cur = conn.cursor()
-
-    palavras = query.lower().split()
-    like_clauses = " AND ".join(["LOWER(nome) LIKE %s" for _ in palavras]) or "TRUE"
-    params = [f"%{p}%" for p in palavras] or []
-
-    cur.execute(
-        f"""
-        SELECT id, nome, tempo, imagem
-        FROM filmes
-        WHERE {like_clauses}
-        """,
-        tuple(params),
-    )
-    rows = cur.fetchall()
-
-    cur.execute(
-        f"""
-        SELECT COUNT(*)
-        FROM filmes
-        WHERE {like_clauses}
-        """,
-        tuple(params),
+    termos = " ".join(query.split())
+    if ordem == "similaridade" and termos:
+        return ordem, f"similarity({NOME_NORMALIZADO}, lower(f_unaccent(%s)))::float8", [termos], True, False
+    if ordem == "relevancia" and termos:
+        return ordem, f"ts_rank(nome_tsv, {TSQUERY})::float8", [query], True, False
+    if ordem == "tempo_desc":
+        return ordem, "duracao_seg", [], True, True
+    if ordem == "tempo_asc":
+        return ordem, "duracao_seg", [], False, True
+    if ordem == "nome_desc":
+        return ordem, NOME_ORDEM, [], True, False
+    if ordem == "random":
+        # Permutação estável por semente: a mesma semente repete a mesma ordem.
+        return ordem, "hashtextextended(id::text, %s)", [semente], False, False
+    return "nome_asc", NOME_ORDEM, [], False, False
+
+
+def _semente(valor: Any) -> int:
+    """Semente da ordem aleatória; gera uma nova se ausente ou inválida."""
+    try:
+        semente = int(valor)
+    except (TypeError, ValueError):
+        semente = -1
+    # Limitada a 31 bits para chegar intacta como número ao JavaScript.
+    return semente if 0 <= semente < 2**31 else secrets.randbelow(2**31)
+
+
+def _encode_cursor(ordem: str, chave: Any, video_id: Any, semente: Optional[int] = None) -> str:
+    payload = {"o": ordem, "k": chave, "i": video_id}
+    if semente is not None:
+        payload["s"] = semente
+    raw = json.dumps(payload, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Dict[str, Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        decoded = {"o": data["o"], "k": data["k"], "i": data["i"], "s": data.get("s")}
+    except (binascii.Error, ValueError, TypeError, KeyError, AttributeError) as exc:
+        raise InvalidCursorError("Cursor de paginação inválido.") from exc
+    if not isinstance(decoded["i"], int):
+        raise InvalidCursorError("Cursor de paginação inválido.")
+    return decoded
+
+
+def validar_cursor(cursor: str, query: str = "", ordem: str = "nome_asc") -> Dict[str, Any]:
+    """
+    Decodifica o cursor e confere se ele é da mesma ordenação e se a chave tem
+    o tipo dela; senão, InvalidCursorError.
+    """
+    dados = _decode_cursor(cursor)
+    efetiva, _, _, _, nullable = _ordenacao(ordem, query, 0)
+    if dados["o"] != efetiva or not _chave_valida(efetiva, dados["k"], nullable):
+        raise InvalidCursorError("Cursor de paginação inválido.")
+    return dados
+
+
+def _chave_valida(ordem: str, chave: Any, nullable: bool) -> bool:
+    """A chave do cursor tem o tipo da expressão de `ordem` (ver _ordenacao)."""
+    if chave is None:
+        return nullable
+    if isinstance(chave, bool):
+        return False
+    if ordem in ("nome_asc", "nome_desc"):
+        return isinstance(chave, str)
+    if ordem in ("relevancia", "similaridade"):
+        return isinstance(chave, (int, float))
+    return isinstance(chave, int)
+
+
+def _keyset_clause(chave_sql: str, chave_params: List[Any], desc: bool, nullable: bool, chave: Any, video_id: int):
+    """Predicado 'depois da última linha vista' na ordem (chave, id)."""
+    op = "<" if desc else ">"
+    if not nullable:
+        return f"({chave_sql}, id) {op} (%s, %s)", chave_params + [chave, video_id]
+    # NULLS LAST nos dois sentidos: após uma chave conhecida ainda vêm as nulas.
+    if chave is None:
+        return f"({chave_sql} IS NULL AND id {op} %s)", [video_id]
+    return (
+        f"({chave_sql} {op} %s OR ({chave_sql} = %s AND id {op} %s) OR {chave_sql} IS NULL)",
+        [chave, chave, video_id],
     )
-    total_count = cur.fetchone()[0]
-
-    cur.close()
-    conn.close()
-
-    resultado: List[dict] = []
-    for row in rows:
-        minutos = tempo_para_minutos(row[2])
-        resultado.append(
-            {
-                "id": row[0],
-                "title": row[1],
-                "duration": row[2],
-                "thumbnail": normalize_image_url(row[3]),
-                "likes": 0,
-                "views": None,
-                "minutos": minutos,
-            }
+
+
+def _filtros(query: str, faixa: str, ordem: str) -> Tuple[str, List[Any]]:
+    """Cláusula WHERE (texto e faixa de duração) e seus parâmetros."""
+    palavras = query.split()
+    if ordem == "relevancia" and palavras:
+        match_clause = f"nome_tsv @@ {TSQUERY}"
+        params: List[Any] = [query]
+    else:
+        match_clause = (
+            " AND ".join([f"{NOME_NORMALIZADO} LIKE '%%' || lower(f_unaccent(%s)) || '%%'" for _ in palavras])
+            or "TRUE"
         )
+        params = [_escape_like(p) for p in palavras]
 
+    faixa_clause = "TRUE"
     if faixa in FAIXAS_MINUTOS:
         lo, hi = FAIXAS_MINUTOS[faixa]
-        resultado = [v for v in resultado if v["minutos"] is not None and lo <= v["minutos"] <= hi]
+        # A faixa é em minutos inteiros: "91-120" inclui até 120:59.
+        faixa_clause = "duracao_seg BETWEEN %s AND %s"
+        params += [lo * 60, hi * 60 + 59]
+
+    return f"{match_clause} AND {faixa_clause}", params
 
-    if ordem == "tempo_desc":
-        resultado.sort(key=lambda v: v["minutos"] or -1, reverse=True)
-    elif ordem == "tempo_asc":
-        resultado.sort(key=lambda v: v["minutos"] or 10**9)
-    elif ordem == "nome_desc":
-        resultado.sort(key=lambda v: v["title"].lower(), reverse=True)
-    elif ordem == "random":
-        random.shuffle(resultado)
-    else:
-        resultado.sort(key=lambda v: v["title"].lower())
 
-    total_count = len(resultado)
-    resultado = resultado[offset : offset + limit]
+def _estimativa_planejador(cur, where: str, params: List[Any]) -> int:
+    cur.execute(f"EXPLAIN (FORMAT JSON) SELECT 1 FROM filmes WHERE {where}", tuple(params))
+    plano = cur.fetchone()[0]
+    if isinstance(plano, str):
+        plano = json.loads(plano)
+    return int(plano[0]["Plan"]["Plan Rows"])
 
-    for v in resultado:
-        v.pop("minutos", None)
 
-    logging.debug("buscar_videos_bd: retornando %s itens (total filtrado %s)", len(resultado), total_count)
-    return {"videos": resultado, "totalCount": total_count}
+def geracao_catalogo() -> Optional[int]:
+    """
+    Geração atual do catálogo, ou None se não puder ser lida (por exemplo,
+    schema antigo sem catalogo_versao); nesse caso o cache de páginas é ignorado.
+    """
+    cached = _geracao_cache.get("geracao")
+    if cached is not None:
+        return cached[0]
+    try:
+        with connection() as conn, conn.cursor() as cur:
+            cur.execute("SELECT geracao FROM catalogo_versao WHERE id = 1")
+            row = cur.fetchone()
+        geracao = row[0] if row else 0
+    except DatabaseError as exc:
+        logging.warning("buscar_videos_bd: geração do catálogo indisponível: %s", exc)
+        geracao = None
+    _geracao_cache.set("geracao", (geracao,))
+    return geracao
+
+
+def cache_stats() -> dict:
+    return {"pages": _page_cache.stats(), "counts": _count_cache.stats()}
+
+
+def contar_videos_bd(query: str, faixa: str = "", ordem: str = "") -> Tuple[int, bool]:
+    """
+    Retorna (total, aproximado) para a busca, com cache por consulta
+    normalizada e filtro. Conta exatamente até COUNT_EXACT_LIMIT linhas; além
+    disso usa a estimativa do planejador, sem varrer o resultado inteiro.
+    """
+    modo = "fts" if ordem == "relevancia" and query.split() else "like"
+    faixa = faixa if faixa in FAIXAS_MINUTOS else ""
+    chave = (" ".join(query.lower().split()), faixa, modo, geracao_catalogo())
+    cached = _count_cache.get(chave)
+    if cached is not None:
+        # Do cache compartilhado o par chega como lista (JSON).
+        total, aproximado = cached
+        return total, aproximado
+
+    where, params = _filtros(query, faixa, ordem)
+    with connection() as conn, conn.cursor() as cur:
+        cur.execute(
+            f"SELECT COUNT(*) FROM (SELECT 1 FROM filmes WHERE {where} LIMIT %s) limitado",
+            tuple(params + [COUNT_EXACT_LIMIT + 1]),
+        )
+        total = cur.fetchone()[0]
+        aproximado = total > COUNT_EXACT_LIMIT
+        if aproximado:
+            total = max(total, _estimativa_planejador(cur, where, params))
+
+    _count_cache.set(chave, (total, aproximado))
+    return total, aproximado
+
+
+def buscar_videos_bd(
+    query: str,
+    offset: int = 0,
+    limit: int = 20,
+    faixa: str = "",
+    ordem: str = "nome_asc",
+    cursor: Optional[str] = None,
+    contar: bool = False,
+    seed: Any = None,
+):
+    """
+    Busca vídeos no banco aplicando filtros, ordenação e paginação.
+
+    Com `cursor` (o `next_cursor` da página anterior) a página é buscada por
+    keyset e `offset` é ignorado, então o custo não cresce com a profundidade.
+    O total só é calculado com `contar=True`; caso contrário `totalCount` vem
+    como None. Na ordem aleatória a resposta traz `seed`; enviá-la nas
+    próximas páginas (ou usar o cursor, que já a contém) mantém a permutação.
+
+    Páginas ficam em cache até o catálogo mudar (ver `geracao_catalogo`).
+    """
+    cursor_data = validar_cursor(cursor, query, ordem) if cursor else None
+    if cursor_data and cursor_data["s"] is not None:
+        seed = cursor_data["s"]
+    semente = _semente(seed)
+
+    where, where_params = _filtros(query, faixa, ordem)
+    ordem, chave_sql, chave_params, desc, nullable = _ordenacao(ordem, query, semente)
+    offset = max(0, offset)
+    limit = max(0, limit)
+
+    # Sem semente do cliente a ordem aleatória é nova a cada busca: não há o
+    # que reaproveitar.
+    geracao = None if ordem == "random" and seed is None else geracao_catalogo()
+    pagina_chave = (
+        " ".join(query.lower().split()),
+        faixa if faixa in FAIXAS_MINUTOS else "",
+        ordem,
+        cursor or offset,
+        limit,
+        semente if ordem == "random" else None,
+        geracao,
+    )
+    pagina = _page_cache.get(pagina_chave) if geracao is not None else None
+    if pagina is None:
+        pagina = _buscar_pagina(
+            where, where_params, ordem, chave_sql, chave_params, desc, nullable,
+            cursor_data, offset, limit, semente,
+        )
+        if geracao is not None:
+            _page_cache.set(pagina_chave, pagina)
+    # Do cache compartilhado a página chega como listas (JSON).
+    videos, next_cursor = pagina
+
+    total_count, aproximado = contar_videos_bd(query, faixa, ordem) if contar else (None, False)
+
+    logging.debug("buscar_videos_bd: retornando %s itens (total filtrado %s)", len(videos), total_count)
+    return {
+        "videos": [dict(video) for video in videos],
+        "totalCount": total_count,
+        "approximate": aproximado,
+        "next_cursor": next_cursor,
+        "seed": semente if ordem == "random" else None,
+    }
+
+
+def _buscar_pagina(
+    where: str,
+    where_params: List[Any],
+    ordem: str,
+    chave_sql: str,
+    chave_params: List[Any],
+    desc: bool,
+    nullable: bool,
+    cursor_data: Optional[Dict[str, Any]],
+    offset: int,
+    limit: int,
+    semente: int,
+) -> Tuple[Tuple[dict, ...], Optional[str]]:
+    """Executa a consulta de uma página; retorna (vídeos, próximo cursor)."""
+    direcao = "DESC" if desc else "ASC"
+    nulls = " NULLS LAST" if nullable else ""
+    order_by = f"{chave_sql} {direcao}{nulls}, id {direcao}"
+
+    keyset_clause, keyset_params = "TRUE", []
+    if cursor_data:
+        keyset_clause, keyset_params = _keyset_clause(
+            chave_sql, chave_params, desc, nullable, cursor_data["k"], cursor_data["i"]
+        )
+        offset = 0
+
+    # Uma linha extra indica se existe próxima página.
+    with connection() as conn, conn.cursor() as cur:
+        cur.execute(
+            f"""
+            SELECT id, nome, tempo, imagem, {chave_sql} AS chave
+            FROM filmes
+            WHERE {where} AND {keyset_clause}
+            ORDER BY {order_by}
+            LIMIT %s OFFSET %s
+            """,
+            tuple(chave_params + where_params + keyset_params + chave_params + [limit + 1, offset]),
+        )
+        rows = cur.fetchall()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        if rows:
+            semente_cursor = semente if ordem == "random" else None
+            next_cursor = _encode_cursor(ordem, rows[-1][4], rows[-1][0], semente_cursor)
+
+    videos = tuple(
+        {
+            "id": row[0],
+            "title": row[1],
+            "duration": row[2],
+            "thumbnail": normalize_image_url(row[3]),
+            "likes": 0,
+            "views": None,
+        }
+        for row in rows
+    )
+    return videos, next_cursor
+
+
+def iterar_filmes(query: str = "", faixa: str = "", itersize: Optional[int] = None) -> Iterator[Filme]:
+    """
+    Percorre o catálogo (opcionalmente filtrado) em ordem de id, sem carregar
+    o resultado em memória. Indicado para exportações e reprocessamentos.
+    """
+    where, params = _filtros(query, faixa, "")
+    return stream_query(
+        f"SELECT id, nome, tempo, imagem, duracao_seg FROM filmes WHERE {where} ORDER BY id",
+        params,
+        itersize=itersize,
+        record=Filme,
+    )
@@ -16,6 +16,10 @@
         let currentVideoTitle = "";
         let translate = t;
         let authenticated = false;
+        // Metadados pré-carregados por /info/batch, por idioma e id: o valor é o
+        // próprio dado ou a promessa do lote ainda em andamento.
+        const infoPrefetch = new Map();
+        const INFO_BATCH_MAX = 24;
 
         const {
             modal,
@@ -170,6 +174,19 @@
                 showImdbNotFound();
                 return;
             }
+            const chave = `${getLang ? getLang() : ""}|${videoId}`;
+            if (infoPrefetch.has(chave)) {
+                Promise.resolve(infoPrefetch.get(chave)).then(data => {
+                    if (currentVideoId !== videoId) return;
+                    if (data) {
+                        renderImdbInfo(data);
+                    } else {
+                        infoPrefetch.delete(chave);
+                        carregarInfoImdb(videoId, title, thumb);
+                    }
+                });
+                return;
+            }
             const params = new URLSearchParams();
             if (title) params.append("title", title);
             if (thumb) params.append("thumb", thumb);
@@ -188,6 +205,39 @@
                 });
         }
 
+        // Pré-carrega os metadados dos vídeos em lotes de /info/batch, para o
+        // modal abrir sem esperar o TMDB. Falhas só deixam o id sem cache.
+        function prefetchInfo(videos) {
+            const lang = getLang ? getLang() : "";
+            const novos = (videos || []).filter(video => video && video.id && !infoPrefetch.has(`${lang}|${video.id}`));
+            for (let inicio = 0; inicio < novos.length; inicio += INFO_BATCH_MAX) {
+                const lote = novos.slice(inicio, inicio + INFO_BATCH_MAX);
+                const pedido = fetcher("/info/batch", {
+                    method: "POST",
+                    headers: { "Content-Type": "application/json" },
+                    body: JSON.stringify({
+                        lang,
+                        items: lote.map(video => ({ id: video.id, title: video.title || "", thumb: video.thumbnail || "" }))
+                    })
+                })
+                    .then(res => (res.ok ? res.json() : { items: {} }))
+                    .catch(() => ({ items: {} }));
+                lote.forEach(video => {
+                    const chave = `${lang}|${video.id}`;
+                    const promessa = pedido.then(data => {
+                        const info = (data.items || {})[video.id] || null;
+                        if (info) {
+                            infoPrefetch.set(chave, info);
+                        } else if (infoPrefetch.get(chave) === promessa) {
+                            infoPrefetch.delete(chave);
+                        }
+                        return info;
+                    });
+                    infoPrefetch.set(chave, promessa);
+                });
+            }
+        }
+
         function open(videoId, title, thumb) {
             currentVideoId = videoId;
             currentVideoTitle = title || "";
@@ -358,6 +408,7 @@
         return {
             open,
             close,
+            prefetchInfo,
             refreshLanguage,
             setAuthState
         };
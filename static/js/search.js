@@ -10,8 +10,35 @@
 
         let translate = t;
         let offset = 0;
+        let nextCursor = null;
+        let randomSeed = null;
+        let exhausted = false;
+        // Fontes que ainda podem trazer páginas na busca atual (modo "AMBOS").
+        let fontesAtivas = new Set();
+        // Soma dos totais das fontes que já responderam na primeira página.
+        let parcialTotal = 0;
         let loading = false;
         let totalCount = 0;
+        let totalApproximate = false;
+        // Cards que entraram na tela e ainda não tiveram os metadados pedidos.
+        let infoPendentes = [];
+        let infoTimer = null;
+        const observadorCards = (typeof IntersectionObserver !== "undefined" && modalController.prefetchInfo)
+            ? new IntersectionObserver(entries => {
+                entries.forEach(entry => {
+                    if (!entry.isIntersecting) return;
+                    observadorCards.unobserve(entry.target);
+                    infoPendentes.push(entry.target._video);
+                });
+                if (infoPendentes.length && !infoTimer) {
+                    infoTimer = setTimeout(() => {
+                        modalController.prefetchInfo(infoPendentes);
+                        infoPendentes = [];
+                        infoTimer = null;
+                    }, 200);
+                }
+            })
+            : null;
         const idsExibidos = (window.AppUtils && window.AppUtils.createIdStore) ? window.AppUtils.createIdStore() : new Set();
 
         const {
@@ -26,12 +53,14 @@
             scrollTopBtn
         } = elements;
 
-        function updateTotalResults(newCount) {
+        function updateTotalResults(newCount, approximate) {
             if (typeof newCount === "number") {
                 totalCount = newCount;
+                totalApproximate = Boolean(approximate);
             }
             if (totalResults) {
-                totalResults.innerHTML = `${translate("totalLabel")}: <b>${totalCount}</b>`;
+                const prefix = totalApproximate ? "~" : "";
+                totalResults.innerHTML = `${translate("totalLabel")}: <b>${prefix}${totalCount}</b>`;
             }
         }
 
@@ -48,24 +77,27 @@
 
         function coletarFiltros() {
             const fonte = fonteSelect.value;
-            if (fonte === "API") {
-                return {
-                    fonte,
-                    duration: durationSelectApi.value,
-                    hd: hdCheckbox.checked ? "ON" : ""
-                };
-            }
-            return {
-                fonte,
-                duration_bd: durationSelectBd.value,
-                order_bd: orderSelectBd.value
-            };
+            const filtros = { fonte };
+            if (fonte === "API" || fonte === "AMBOS") {
+                filtros.duration = durationSelectApi.value;
+                filtros.hd = hdCheckbox.checked ? "ON" : "";
+            }
+            if (fonte === "BD" || fonte === "AMBOS") {
+                filtros.duration_bd = durationSelectBd.value;
+                filtros.order_bd = orderSelectBd.value;
+            }
+            return filtros;
         }
 
         function alternarFiltros() {
             const fonte = fonteSelect.value;
-            document.getElementById("filters-api").style.display = fonte === "API" ? "flex" : "none";
-            document.getElementById("filters-bd").style.display = fonte === "BD" ? "flex" : "none";
+            document.getElementById("filters-api").style.display = fonte !== "BD" ? "flex" : "none";
+            document.getElementById("filters-bd").style.display = fonte !== "API" ? "flex" : "none";
+        }
+
+        function fonteDaRequisicao() {
+            if (fontesAtivas.has("API") && fontesAtivas.has("BD")) return "AMBOS";
+            return fontesAtivas.has("API") ? "API" : "BD";
         }
 
         function adicionarVideoCard(video) {
@@ -104,18 +136,107 @@
             watchBtn.addEventListener("click", () => modalController.open(video.id, video.title, thumb));
             videoResults.appendChild(videoCard);
             idsExibidos.add(video.id);
+            if (observadorCards) {
+                videoCard._video = video;
+                observadorCards.observe(videoCard);
+            }
+        }
+
+        // Lê a resposta NDJSON de /buscar chamando onItem a cada linha, à
+        // medida que chegam; sem suporte a streaming, lê tudo de uma vez.
+        function lerNdjson(response, onItem) {
+            const processar = texto => texto.split("\n").forEach(linha => {
+                if (linha.trim()) onItem(JSON.parse(linha));
+            });
+            if (!response.body || typeof TextDecoder === "undefined") {
+                return response.text().then(processar);
+            }
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let pendente = "";
+            function ler() {
+                return reader.read().then(({ done, value }) => {
+                    pendente += decoder.decode(value || new Uint8Array(), { stream: !done });
+                    const fim = pendente.lastIndexOf("\n");
+                    if (fim >= 0) {
+                        processar(pendente.slice(0, fim));
+                        pendente = pendente.slice(fim + 1);
+                    }
+                    if (done) {
+                        processar(pendente);
+                        return undefined;
+                    }
+                    return ler();
+                });
+            }
+            return ler();
+        }
+
+        // Para de paginar uma fonte que falhou (ex.: cursor inválido).
+        function descartarFonte(fonte) {
+            fontesAtivas.delete(fonte);
+            if (fonte === "BD") nextCursor = null;
+            exhausted = fontesAtivas.size === 0;
+        }
+
+        // Aplica o lote de uma fonte: desenha os cards e avança a paginação dela.
+        function aplicarFonte(item, novaBusca) {
+            if (item.status !== "ok") {
+                console.warn(`/buscar: fonte ${item.source} ${item.status}`);
+                // Prazo estourado ou fonte ocupada são tentados de novo; erro não.
+                if (item.status === "error") descartarFonte(item.source);
+                return;
+            }
+            (item.videos || []).forEach(adicionarVideoCard);
+            if (novaBusca) {
+                parcialTotal += item.totalCount;
+                updateTotalResults(parcialTotal, item.approximate || totalApproximate);
+            }
+            // O offset é o da API; fontes que estouraram o prazo são tentadas
+            // de novo na próxima página.
+            if (item.source === "API") {
+                offset += item.count;
+                if (item.count === 0) fontesAtivas.delete("API");
+            }
+            // A fonte Banco pagina por cursor; sem próximo cursor não há mais páginas.
+            if (item.source === "BD") {
+                nextCursor = item.next_cursor || null;
+                if (!nextCursor) fontesAtivas.delete("BD");
+                // Mantém a mesma permutação aleatória em todas as páginas.
+                if (item.seed !== null && item.seed !== undefined) {
+                    randomSeed = item.seed;
+                }
+            }
         }
 
         function buscarVideos(queryText, novaBusca = false, filtros = {}) {
             if (loading || !queryText) return;
-            loading = true;
             if (novaBusca) {
                 offset = 0;
+                nextCursor = null;
+                randomSeed = null;
+                exhausted = false;
+                fontesAtivas = new Set(filtros.fonte === "AMBOS" ? ["API", "BD"] : [filtros.fonte]);
+                parcialTotal = 0;
+                totalApproximate = false;
                 idsExibidos.clear();
+                if (observadorCards) observadorCards.disconnect();
                 videoResults.innerHTML = "";
             }
+            if (exhausted) return;
+            loading = true;
 
-            const paramsObj = { query: queryText, offset, fonte: filtros.fonte };
+            const paramsObj = { query: queryText, offset, fonte: fonteDaRequisicao(), stream: "1" };
+            if (nextCursor) {
+                paramsObj.cursor = nextCursor;
+            }
+            if (randomSeed !== null) {
+                paramsObj.seed = randomSeed;
+            }
+            if (novaBusca) {
+                // O total só é exibido na primeira página; as demais não o calculam.
+                paramsObj.count = "1";
+            }
             Object.entries(filtros).forEach(([k, v]) => {
                 if (k !== "fonte" && v !== "") {
                     paramsObj[k] = v;
@@ -135,13 +256,25 @@
                 body: body,
                 headers: { "Content-Type": "application/x-www-form-urlencoded" }
             })
-                .then(response => response.json())
-                .then(data => {
-                    if (novaBusca) {
-                        updateTotalResults(data.totalCount);
+                .then(response => {
+                    if (!response.ok) {
+                        return response.json().catch(() => ({})).then(erro => {
+                            if (erro.code === "invalid_cursor") descartarFonte("BD");
+                            throw new Error(erro.error || `HTTP ${response.status}`);
+                        });
                     }
-                    data.videos.forEach(adicionarVideoCard);
-                    offset += data.videos.length;
+                    return lerNdjson(response, item => {
+                        if (item.type === "source") {
+                            aplicarFonte(item, novaBusca);
+                        } else if (item.type === "done") {
+                            if (novaBusca) {
+                                updateTotalResults(item.totalCount, item.approximate);
+                            }
+                            exhausted = fontesAtivas.size === 0;
+                        }
+                    });
+                })
+                .then(() => {
                     loading = false;
                 })
                 .catch(error => {
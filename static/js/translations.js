@@ -8,6 +8,7 @@ window.APP_TRANSLATIONS = {
         labelSource: "Fonte:",
         optionSourceApi: "API",
         optionSourceDb: "Banco",
+        optionSourceBoth: "API + Banco",
         labelDurationApi: "Duração:",
         optionDurationAny: "Qualquer duração",
         optionDurationLong: "Longo",
@@ -28,6 +29,8 @@ window.APP_TRANSLATIONS = {
         optionOrderNameAsc: "Nome A-Z",
         optionOrderNameDesc: "Nome Z-A",
         optionOrderRandom: "Aleatório",
+        optionOrderSimilarity: "Mais parecidos",
+        optionOrderRelevance: "Relevância",
         placeholderSearch: "Digite o que deseja buscar...",
         buttonSearch: "Buscar",
         totalLabel: "TOTAL",
@@ -84,6 +87,7 @@ window.APP_TRANSLATIONS = {
         labelSource: "Source:",
         optionSourceApi: "API",
         optionSourceDb: "Database",
+        optionSourceBoth: "API + Database",
         labelDurationApi: "Duration:",
         optionDurationAny: "Any duration",
         optionDurationLong: "Long",
@@ -104,6 +108,8 @@ window.APP_TRANSLATIONS = {
         optionOrderNameAsc: "Name A-Z",
         optionOrderNameDesc: "Name Z-A",
         optionOrderRandom: "Random",
+        optionOrderSimilarity: "Best match",
+        optionOrderRelevance: "Relevance",
         placeholderSearch: "Type what you want to search...",
         buttonSearch: "Search",
         totalLabel: "TOTAL",
@@ -160,6 +166,7 @@ window.APP_TRANSLATIONS = {
         labelSource: "Fuente:",
         optionSourceApi: "API",
         optionSourceDb: "Base de datos",
+        optionSourceBoth: "API + Base de datos",
         labelDurationApi: "Duración:",
         optionDurationAny: "Cualquier duración",
         optionDurationLong: "Largo",
@@ -180,6 +187,8 @@ window.APP_TRANSLATIONS = {
         optionOrderNameAsc: "Nombre A-Z",
         optionOrderNameDesc: "Nombre Z-A",
         optionOrderRandom: "Aleatorio",
+        optionOrderSimilarity: "Más parecidos",
+        optionOrderRelevance: "Relevancia",
         placeholderSearch: "Escribe lo que quieres buscar...",
         buttonSearch: "Buscar",
         totalLabel: "TOTAL",
@@ -1,3 +1,4 @@
+import json
 import os
 import unittest
 from unittest.mock import patch
@@ -6,6 +7,7 @@ from werkzeug.security import generate_password_hash
 
 import app as app_module
 from services import auth
+from services.video_repository import Filme
 
 
 class AuthAndAdminRoutesTest(unittest.TestCase):
@@ -92,6 +94,32 @@ class AuthAndAdminRoutesTest(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.get_json(), expected)
 
+        erro = app_module.VideoUnavailableError("Video has not been found")
+        with patch.object(app_module, "listar_resolucoes", side_effect=erro):
+            response = self.client.get("/admin/formats/123")
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.get_json()["code"], "video_unavailable")
+
+        falha = app_module.ExtractionFailedError("HTTP Error 503", "yt_dlp.utils.DownloadError")
+        with patch.object(app_module, "listar_resolucoes", side_effect=falha):
+            response = self.client.get("/admin/formats/123")
+        self.assertEqual(response.status_code, 502)
+        self.assertEqual(response.get_json()["code"], "extraction_failed")
+
+    def test_catalog_export_streams_ndjson(self):
+        self.assertEqual(self.client.get("/admin/export").status_code, 401)
+
+        self._login()
+        filmes = iter([Filme(1, "Um", "01:30:00", "", 5400), Filme(2, "Dois", None, "", None)])
+        with patch.object(app_module, "iterar_filmes", return_value=filmes) as iterar:
+            response = self.client.get("/admin/export?query=um&duration_bd=longos")
+            linhas = [json.loads(linha) for linha in response.get_data(as_text=True).splitlines()]
+
+        iterar.assert_called_once_with("um", "longos")
+        self.assertEqual(response.mimetype, "application/x-ndjson")
+        self.assertEqual([linha["nome"] for linha in linhas], ["Um", "Dois"])
+        self.assertEqual(linhas[0]["duracao_seg"], 5400)
+
     def test_healthcheck_is_public(self):
         response = self.client.get("/healthz")
         self.assertEqual(response.status_code, 200)
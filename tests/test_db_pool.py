@@ -0,0 +1,107 @@
+import os
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+from psycopg2 import OperationalError
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+from services import db
+
+
+def _fake_conn():
+    conn = MagicMock()
+    conn.closed = 0
+    conn.get_transaction_status.return_value = TRANSACTION_STATUS_IDLE
+    return conn
+
+
+class ConnectionPoolTest(unittest.TestCase):
+    def test_reuses_idle_connections(self):
+        connect = MagicMock(side_effect=lambda: _fake_conn())
+        pool = db.ConnectionPool(2, connect=connect)
+
+        first = pool.getconn()
+        pool.putconn(first)
+        second = pool.getconn()
+
+        self.assertIs(first, second)
+        self.assertEqual(connect.call_count, 1)
+        self.assertEqual(pool.stats()["created"], 1)
+        self.assertEqual(pool.stats()["in_use"], 1)
+
+    def test_reconnects_when_idle_connection_is_dead(self):
+        pool = db.ConnectionPool(1, ping_after=0, connect=lambda: _fake_conn())
+        dead = pool.getconn()
+        pool.putconn(dead)
+        dead.cursor.return_value.__enter__.return_value.execute.side_effect = OperationalError("gone")
+
+        fresh = pool.getconn()
+
+        self.assertIsNot(fresh, dead)
+        dead.close.assert_called_once_with()
+        self.assertEqual(pool.stats()["created"], 2)
+        self.assertEqual(pool.stats()["discarded"], 1)
+
+    def test_waits_for_a_free_connection_and_times_out(self):
+        pool = db.ConnectionPool(1, timeout=0.05, connect=lambda: _fake_conn())
+        held = pool.getconn()
+        with self.assertRaises(db.PoolTimeoutError):
+            pool.getconn()
+
+        threading.Timer(0.02, pool.putconn, args=(held,)).start()
+        pool.timeout = 1
+        started = time.monotonic()
+        self.assertIs(pool.getconn(), held)
+        self.assertLess(time.monotonic() - started, 1)
+
+    def test_context_manager_discards_broken_connections(self):
+        pool = db.ConnectionPool(1, connect=lambda: _fake_conn())
+        original = db._pool  # pylint: disable=protected-access
+        db._pool = pool  # pylint: disable=protected-access
+        try:
+            with self.assertRaises(OperationalError):
+                with db.connection():
+                    raise OperationalError("server closed the connection")
+            with db.connection() as conn:
+                pass
+        finally:
+            db._pool = original  # pylint: disable=protected-access
+
+        conn.commit.assert_called_once_with()
+        self.assertEqual(pool.stats(), {
+            "size": 1, "idle": 1, "in_use": 0, "waiting": 0, "created": 2, "discarded": 1,
+        })
+
+    def test_stream_query_uses_a_named_cursor_and_returns_the_connection(self):
+        conn = _fake_conn()
+        cursor = conn.cursor.return_value.__enter__.return_value
+        cursor.__iter__.return_value = iter([(1, "a"), (2, "b"), (3, "c")])
+        pool = db.ConnectionPool(1, connect=lambda: conn)
+        original = db._pool  # pylint: disable=protected-access
+        db._pool = pool  # pylint: disable=protected-access
+        try:
+            rows = db.stream_query("SELECT id, nome FROM filmes", [], itersize=2, record=lambda *r: r[1])
+            self.assertEqual(pool.stats()["in_use"], 0)
+            self.assertEqual(next(rows), "a")
+            self.assertEqual(pool.stats()["in_use"], 1)
+            rows.close()
+        finally:
+            db._pool = original  # pylint: disable=protected-access
+
+        self.assertTrue(conn.cursor.call_args.kwargs["name"].startswith("stream_"))
+        self.assertEqual(cursor.itersize, 2)
+        cursor.execute.assert_called_once_with("SELECT id, nome FROM filmes", ())
+        self.assertEqual(pool.stats()["in_use"], 0)
+
+    def test_default_size_covers_prefetch_and_overdue_fanout_threads(self):
+        with patch.object(db.prefetcher, "workers", 2), patch.object(db, "PER_SOURCE_LIMIT", 4):
+            with patch.dict(os.environ, {"GUNICORN_THREADS": "6", "GUNICORN_WORKER_CLASS": "gthread"}):
+                self.assertEqual(db._default_pool_size(), 12)  # pylint: disable=protected-access
+            with patch.dict(os.environ, {"GUNICORN_WORKER_CLASS": "gevent"}):
+                self.assertEqual(db._default_pool_size(), 22)  # pylint: disable=protected-access
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import threading
+import time
+import unittest
+
+from services.extraction import (
+    ExtractionBusyError,
+    ExtractionFailedError,
+    ExtractionService,
+    ExtractionTimeoutError,
+)
+
+
+class ExtractionServiceTest(unittest.TestCase):
+    def _service(self, **kwargs):
+        options = {"workers": 1, "max_queue": 0, "timeout": 5, "queue_timeout": 5}
+        options.update(kwargs)
+        service = ExtractionService(**options)
+        self.addCleanup(service.shutdown)
+        return service
+
+    def test_runs_jobs_in_a_worker_process_and_reports_errors(self):
+        service = self._service()
+
+        self.assertEqual(service.run(pow, 2, 10), 1024)
+        with self.assertRaisesRegex(ExtractionFailedError, "invalid literal") as erro:
+            service.run(int, "x")
+        self.assertTrue(erro.exception.is_a(ValueError))
+        self.assertFalse(erro.exception.is_a(TypeError))
+        # O mesmo processo continua atendendo depois de um erro.
+        self.assertEqual(service.run(abs, -3), 3)
+
+        stats = service.stats()
+        self.assertEqual((stats["completed"], stats["failed"], stats["restarts"]), (2, 1, 0))
+        self.assertGreater(stats["max_run_ms"], 0)
+
+    def test_slow_jobs_are_cancelled_and_the_worker_replaced(self):
+        service = self._service(timeout=1)
+
+        started = time.monotonic()
+        with self.assertRaises(ExtractionTimeoutError):
+            service.run(time.sleep, 30)
+        self.assertLess(time.monotonic() - started, 5)
+
+        self.assertEqual(service.run(pow, 3, 2), 9)
+        self.assertEqual(service.stats()["timeouts"], 1)
+
+    def test_full_queue_fails_fast(self):
+        service = self._service()
+        service.run(abs, 0)  # processo já iniciado
+        ocupado = threading.Thread(target=service.run, args=(time.sleep, 1))
+        ocupado.start()
+        self.addCleanup(ocupado.join)
+        time.sleep(0.2)
+
+        started = time.monotonic()
+        with self.assertRaises(ExtractionBusyError):
+            service.run(abs, 1)
+        self.assertLess(time.monotonic() - started, 0.1)
+        self.assertEqual(service.stats()["rejected"], 1)
+
+    def test_without_workers_runs_inline(self):
+        service = self._service(workers=0)
+        self.assertEqual(service.run(lambda: threading.get_ident()), threading.get_ident())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,157 @@
+import json
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import app as app_module
+from services import fanout
+
+
+class RunParallelTest(unittest.TestCase):
+    def test_sources_run_concurrently_and_slow_ones_time_out(self):
+        liberar = threading.Event()
+
+        def lenta():
+            liberar.wait(2)
+            return "tarde"
+
+        def falha():
+            raise RuntimeError("fora do ar")
+
+        started = time.monotonic()
+        results = fanout.run_parallel(
+            {"lenta": lenta, "rapida": lambda: "ok", "falha": falha},
+            {"lenta": 0.1, "rapida": 1, "falha": 1},
+        )
+        liberar.set()
+
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(results["rapida"].status, "ok")
+        self.assertEqual(results["rapida"].value, "ok")
+        self.assertEqual(results["lenta"].status, "timeout")
+        self.assertEqual(results["falha"].status, "error")
+        self.assertIsInstance(results["falha"].error, RuntimeError)
+
+    def test_a_stuck_source_is_capped_and_does_not_block_others(self):
+        liberar = threading.Event()
+        self.addCleanup(liberar.set)
+
+        def presa():
+            liberar.wait(5)
+
+        for _ in range(fanout.PER_SOURCE_LIMIT):
+            fanout.run_parallel({"presa": presa}, {"presa": 0.01})
+        results = fanout.run_parallel({"presa": presa, "rapida": lambda: 1}, {"presa": 1, "rapida": 1})
+
+        self.assertEqual(results["presa"].status, "busy")
+        self.assertEqual(results["rapida"].status, "ok")
+        liberar.set()
+        deadline = time.monotonic() + 2
+        while fanout.run_parallel({"presa": lambda: 1}, {"presa": 1})["presa"].status == "busy":
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+
+    def test_cancelled_tasks_that_never_started_do_not_count_as_overdue(self):
+        liberar = threading.Event()
+        self.addCleanup(liberar.set)
+        executor = ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(executor.shutdown)
+        with patch.object(fanout, "_executor", executor):
+            # "presa" ocupa a única thread; "fila" estoura o prazo sem começar.
+            results = fanout.run_parallel(
+                {"presa": lambda: liberar.wait(5), "fila": lambda: 1}, {"presa": 0.05, "fila": 0.05}
+            )
+
+        self.assertEqual((results["presa"].status, results["fila"].status), ("timeout", "timeout"))
+        self.assertEqual(fanout._overdue.get("fila", 0), 0)
+        self.assertEqual(fanout._overdue["presa"], 1)
+        liberar.set()
+        deadline = time.monotonic() + 2
+        while fanout._overdue["presa"]:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+
+    def test_concurrent_healthy_calls_are_not_limited_per_source(self):
+        chamadas = fanout.PER_SOURCE_LIMIT + 1
+        barreira = threading.Barrier(chamadas, timeout=2)
+        resultados = []
+
+        def buscar():
+            resultados.append(fanout.run_parallel({"BD": barreira.wait}, {"BD": 3})["BD"].status)
+
+        threads = [threading.Thread(target=buscar) for _ in range(chamadas)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(resultados, ["ok"] * chamadas)
+
+
+class BuscarFanoutTest(unittest.TestCase):
+    def setUp(self):
+        self.client = app_module.app.test_client()
+
+    def test_combined_mode_returns_what_arrived_with_source_status(self):
+        api = {"videos": [{"id": 1}, {"id": 2}], "totalCount": 50}
+
+        def bd_fora(*args, **kwargs):
+            raise RuntimeError("banco indisponível")
+
+        with patch.object(app_module, "buscar_videos", return_value=api), patch.object(
+            app_module, "buscar_videos_bd", side_effect=bd_fora
+        ), patch.object(app_module.prefetcher, "schedule") as schedule:
+            response = self.client.post("/buscar", data={"query": "filme", "fonte": "AMBOS"})
+
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual([v["id"] for v in data["videos"]], [1, 2])
+        self.assertEqual(data["totalCount"], 50)
+        self.assertEqual(data["sources"]["API"]["status"], "ok")
+        self.assertEqual(data["sources"]["API"]["count"], 2)
+        self.assertEqual(data["sources"]["BD"]["status"], "error")
+        schedule.assert_called_once()
+        self.assertEqual(schedule.call_args.args[0], ("API", "filme", 2, "", False))
+
+    def test_stream_mode_sends_each_source_as_it_arrives_without_duplicates(self):
+        liberar_bd = threading.Event()
+        api = {"videos": [{"id": 1}, {"id": 2}], "totalCount": 2}
+        bd = {"videos": [{"id": 2}, {"id": 3}], "totalCount": 2, "approximate": False, "next_cursor": "c2", "seed": None}
+
+        def bd_lento(*args, **kwargs):
+            liberar_bd.wait(2)
+            return bd
+
+        with patch.object(app_module, "buscar_videos", return_value=api), patch.object(
+            app_module, "buscar_videos_bd", side_effect=bd_lento
+        ), patch.object(app_module.prefetcher, "schedule"):
+            response = self.client.post("/buscar", data={"query": "x", "fonte": "AMBOS", "stream": "1"}, buffered=False)
+            linhas = response.iter_encoded()
+            primeira = json.loads(next(linhas))
+            liberar_bd.set()
+            resto = [json.loads(linha) for linha in linhas]
+            response.close()
+
+        self.assertEqual(response.mimetype, "application/x-ndjson")
+        self.assertEqual((primeira["source"], [v["id"] for v in primeira["videos"]]), ("API", [1, 2]))
+        self.assertEqual((resto[0]["source"], [v["id"] for v in resto[0]["videos"]]), ("BD", [3]))
+        self.assertEqual(resto[1]["type"], "done")
+        self.assertEqual((resto[1]["totalCount"], resto[1]["next_cursor"]), (4, "c2"))
+        self.assertEqual(resto[1]["sources"]["BD"]["count"], 2)
+
+    def test_stream_mode_rejects_an_invalid_cursor_before_streaming(self):
+        with patch.object(app_module, "buscar_videos") as api, patch.object(app_module, "buscar_videos_bd") as bd:
+            response = self.client.post(
+                "/buscar", data={"query": "x", "fonte": "AMBOS", "stream": "1", "cursor": "lixo"}
+            )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.get_json()["code"], "invalid_cursor")
+        api.assert_not_called()
+        bd.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import json
+import os
+import runpy
+import subprocess
+import sys
+import unittest
+from unittest.mock import patch
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONF = os.path.join(ROOT, "gunicorn.conf.py")
+
+# Lê os limites efetivos num processo novo, já que são fixados na importação.
+LIMITES = """
+import json
+import app
+from services import fanout, http_client
+adapter = http_client._get_session().get_adapter("https://ok.ru")
+print(json.dumps({
+    "fanout": fanout._workers,
+    "per_source": fanout.PER_SOURCE_LIMIT,
+    "info_batch": app._info_executor._max_workers,
+    "http_pool": adapter._pool_maxsize,
+}))
+"""
+
+
+class GunicornConfTest(unittest.TestCase):
+    def test_threaded_mode_is_the_default(self):
+        with patch.dict(os.environ, {"GUNICORN_THREADS": "6"}, clear=False):
+            os.environ.pop("GUNICORN_WORKER_CLASS", None)
+            conf = runpy.run_path(CONF)
+        self.assertEqual((conf["worker_class"], conf["threads"]), ("gthread", 6))
+        self.assertNotIn("worker_connections", conf)
+
+    @staticmethod
+    def _limites(**env):
+        ambiente = {**os.environ, **env}
+        for nome in ("SEARCH_FANOUT_WORKERS", "SEARCH_FANOUT_PER_SOURCE", "INFO_BATCH_WORKERS", "HTTP_POOL_SIZE"):
+            ambiente.pop(nome, None)
+        saida = subprocess.run(
+            [sys.executable, "-c", LIMITES], cwd=ROOT, env=ambiente, capture_output=True, text=True, check=True
+        )
+        return json.loads(saida.stdout.strip().splitlines()[-1])
+
+    def test_gevent_mode_scales_the_upstream_pools(self):
+        with patch.dict(os.environ, {"GUNICORN_WORKER_CLASS": "gevent", "GUNICORN_WORKER_CONNECTIONS": "500"}):
+            conf = runpy.run_path(CONF)
+        self.assertEqual((conf["worker_class"], conf["worker_connections"]), ("gevent", 500))
+
+        self.assertEqual(
+            self._limites(GUNICORN_WORKER_CLASS="gevent", UPSTREAM_CONCURRENCY="300"),
+            {"fanout": 300, "per_source": 150, "info_batch": 300, "http_pool": 300},
+        )
+        self.assertEqual(
+            self._limites(GUNICORN_WORKER_CLASS="gthread"),
+            {"fanout": 8, "per_source": 4, "info_batch": 4, "http_pool": 10},
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
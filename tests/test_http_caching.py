@@ -0,0 +1,68 @@
+import gzip
+import os
+import unittest
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+
+from flask import url_for
+
+import app as app_module
+
+
+class HttpCachingTest(unittest.TestCase):
+    def setUp(self):
+        self.client = app_module.app.test_client()
+
+    def test_static_files_are_versioned_compressed_and_long_lived(self):
+        with app_module.app.test_request_context():
+            url = url_for("static", filename="js/search.js")
+        self.assertIn("?v=", url)
+
+        response = self.client.get(url, headers={"Accept-Encoding": "gzip"})
+        again = self.client.get(url, headers={"Accept-Encoding": "gzip"})
+
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertIn("immutable", response.headers["Cache-Control"])
+        self.assertIn("Accept-Encoding", response.headers["Vary"])
+        with open(os.path.join(app_module.app.static_folder, "js", "search.js"), "rb") as original:
+            self.assertEqual(gzip.decompress(response.data), original.read())
+        self.assertEqual(again.data, response.data)
+        response.close()
+        again.close()
+
+    def test_responses_are_plain_without_accept_encoding(self):
+        response = self.client.get("/static/js/search.js")
+        self.assertNotIn("Content-Encoding", response.headers)
+        response.close()
+
+    def test_info_from_database_supports_conditional_requests(self):
+        cursor = MagicMock()
+        cursor.fetchone.return_value = (
+            "tt1", "Filme", "Sinopse " * 100, "", "Drama", "7.5", "pt-BR",
+            datetime(2026, 1, 2, tzinfo=timezone.utc),
+        )
+        conn = MagicMock()
+        conn.cursor.return_value.__enter__.return_value = cursor
+
+        @contextmanager
+        def fake_connection():
+            yield conn
+
+        with patch.object(app_module, "connection", fake_connection):
+            first = self.client.get("/info/123?lang=pt-BR", headers={"Accept-Encoding": "gzip"})
+            etag = first.headers["ETag"]
+            by_etag = self.client.get("/info/123?lang=pt-BR", headers={"If-None-Match": etag})
+            by_date = self.client.get(
+                "/info/123?lang=pt-BR", headers={"If-Modified-Since": first.headers["Last-Modified"]}
+            )
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.headers["Content-Encoding"], "gzip")
+        self.assertEqual(first.headers["Last-Modified"], "Fri, 02 Jan 2026 00:00:00 GMT")
+        self.assertEqual(by_etag.status_code, 304)
+        self.assertEqual(by_date.status_code, 304)
+
+
+if __name__ == "__main__":
+    unittest.main()
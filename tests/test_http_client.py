@@ -0,0 +1,78 @@
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+import requests
+
+from services import http_client
+
+
+def _response(status):
+    response = MagicMock()
+    response.status_code = status
+    return response
+
+
+class HttpClientTest(unittest.TestCase):
+    def setUp(self):
+        self.session = MagicMock()
+        patches = [
+            patch.object(http_client, "_get_session", return_value=self.session),
+            patch.object(http_client, "BACKOFF", 0),
+            patch.object(http_client, "RETRIES", 2),
+            patch.dict(http_client._stats, clear=True),  # pylint: disable=protected-access
+        ]
+        for item in patches:
+            item.start()
+            self.addCleanup(item.stop)
+
+    def test_idempotent_calls_are_retried_with_default_timeout(self):
+        self.session.request.side_effect = [requests.ConnectionError("reset"), _response(503), _response(200)]
+
+        response = http_client.get("https://api.example.com/x", params={"q": 1})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.session.request.call_count, 3)
+        self.assertEqual(self.session.request.call_args.kwargs["timeout"], http_client.DEFAULT_TIMEOUT)
+        stats = http_client.stats()["api.example.com"]
+        self.assertEqual((stats["requests"], stats["errors"], stats["retries"]), (3, 2, 2))
+
+    def test_post_is_not_retried_unless_marked_idempotent(self):
+        self.session.request.return_value = _response(503)
+
+        self.assertEqual(http_client.post("https://ok.ru/api").status_code, 503)
+        self.assertEqual(self.session.request.call_count, 1)
+
+        http_client.post("https://ok.ru/api", idempotent=True)
+        self.assertEqual(self.session.request.call_count, 4)
+
+    def test_last_error_is_raised_after_retries(self):
+        self.session.request.side_effect = requests.Timeout("lento")
+
+        with self.assertRaises(requests.Timeout):
+            http_client.get("https://api.example.com/x", timeout=1)
+
+        self.assertEqual(self.session.request.call_count, 3)
+        self.assertEqual(self.session.request.call_args.kwargs["timeout"], 1)
+
+    def test_deadline_caps_timeouts_and_skips_retries_that_would_not_fit(self):
+        self.session.request.side_effect = requests.Timeout("lento")
+
+        with patch.object(http_client, "MIN_ATTEMPT", 5):
+            with self.assertRaises(requests.Timeout):
+                http_client.post("https://ok.ru/api", idempotent=True, timeout=(3, 15), deadline=time.monotonic() + 2)
+
+        self.assertEqual(self.session.request.call_count, 1)
+        connect, read = self.session.request.call_args.kwargs["timeout"]
+        self.assertLessEqual(connect, 2)
+        self.assertLessEqual(read, 2)
+
+    def test_expired_deadline_fails_without_a_request(self):
+        with self.assertRaises(requests.Timeout):
+            http_client.get("https://api.example.com/x", deadline=time.monotonic() - 1)
+
+        self.session.request.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
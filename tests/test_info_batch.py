@@ -0,0 +1,120 @@
+import threading
+import unittest
+from contextlib import contextmanager
+from unittest.mock import MagicMock, patch
+
+import app as app_module
+from services.tmdb_client import TMDBUnavailableError
+
+
+class InfoBatchTest(unittest.TestCase):
+    def setUp(self):
+        self.client = app_module.app.test_client()
+        self.cursor = MagicMock()
+        conn = MagicMock()
+        conn.cursor.return_value.__enter__.return_value = self.cursor
+
+        @contextmanager
+        def fake_connection():
+            yield conn
+
+        patcher = patch.object(app_module, "connection", fake_connection)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_cached_rows_come_from_one_query_and_misses_are_looked_up_concurrently(self):
+        self.cursor.fetchall.side_effect = [
+            [(101, "tt1", "Salvo", "Sinopse", "", "Drama", "7.0", "pt-BR")],
+            [(303, "Nome no catálogo")],
+            [],
+        ]
+        barreira = threading.Barrier(2, timeout=2)
+
+        def tmdb(titulo, lang):
+            barreira.wait()  # só passa se as duas consultas rodarem juntas
+            return {"id_imdb": "tt9", "titulo": titulo, "sinopse": "", "imagem": "", "generos": "", "nota": ""}
+
+        with patch.object(app_module, "buscar_info_tmdb", side_effect=tmdb) as tmdb_mock, patch.object(
+            app_module, "execute_batch"
+        ) as execute_batch:
+            response = self.client.post(
+                "/info/batch",
+                json={
+                    "lang": "pt-BR",
+                    "items": [
+                        {"id": "101", "title": "Qualquer"},
+                        {"id": "202", "title": "Novo"},
+                        {"id": "303", "title": ""},
+                    ],
+                },
+            )
+
+        self.assertEqual(response.status_code, 200)
+        items = response.get_json()["items"]
+        self.assertTrue(items["101"]["cached"])
+        self.assertEqual(items["101"]["titulo"], "Salvo")
+        self.assertEqual(items["202"]["titulo"], "Novo")
+        self.assertEqual(items["303"]["titulo"], "Nome no catálogo")
+        self.assertEqual(tmdb_mock.call_count, 2)
+        sql, params = self.cursor.execute.call_args_list[0].args
+        self.assertIn("ANY(%s)", sql)
+        self.assertEqual(params, ([101, 202, 303],))
+        self.assertEqual(len(execute_batch.call_args.args[2]), 2)
+
+    def test_recent_not_found_ids_skip_upstream_lookups(self):
+        self.cursor.fetchall.side_effect = [[], [(404,)]]
+
+        with patch.object(app_module, "buscar_info_tmdb", return_value=None) as tmdb_mock, patch.object(
+            app_module, "buscar_info_imdb_fallback", return_value=None
+        ), patch.object(app_module, "execute_batch") as execute_batch:
+            response = self.client.post(
+                "/info/batch",
+                json={"items": [{"id": "404", "title": "Obscuro"}, {"id": "505", "title": "Outro"}]},
+            )
+
+        items = response.get_json()["items"]
+        self.assertTrue(items["404"]["empty"])
+        self.assertTrue(items["505"]["empty"])
+        tmdb_mock.assert_called_once_with("Outro", "")
+        sql, rows = execute_batch.call_args.args[1:]
+        self.assertIn("infofilmes_nao_encontrados", sql)
+        self.assertEqual(rows, [(505, "", "outro")])
+        ids, titulos, lang = self.cursor.execute.call_args_list[1].args[1][:3]
+        self.assertEqual((ids, titulos, lang), ([404, 505], ["obscuro", "outro"], ""))
+
+    def test_upstream_failures_are_not_recorded_as_not_found(self):
+        self.cursor.fetchone.return_value = None
+        self.cursor.fetchall.side_effect = [[], [], []]
+
+        with patch.object(
+            app_module, "buscar_info_tmdb", side_effect=TMDBUnavailableError("fora do ar")
+        ), patch.object(app_module, "buscar_info_imdb_fallback", return_value=None), patch.object(
+            app_module, "execute_batch"
+        ) as execute_batch:
+            response = self.client.post("/info/batch", json={"lang": "pt-BR", "items": [{"id": "606", "title": "X"}]})
+            unico = self.client.get("/info/606?title=X&lang=pt-BR")
+
+        self.assertTrue(response.get_json()["items"]["606"]["empty"])
+        self.assertTrue(unico.get_json()["empty"])
+        execute_batch.assert_not_called()
+
+    def test_single_info_respects_recent_not_found(self):
+        self.cursor.fetchone.return_value = None
+        self.cursor.fetchall.return_value = [(404,)]
+
+        with patch.object(app_module, "buscar_info_tmdb") as tmdb_mock:
+            response = self.client.get("/info/404?title=Obscuro")
+
+        self.assertTrue(response.get_json()["empty"])
+        tmdb_mock.assert_not_called()
+
+    def test_rejects_oversized_batches_and_invalid_ids(self):
+        muitos = [{"id": str(i), "title": "x"} for i in range(app_module.INFO_BATCH_MAX + 1)]
+
+        self.assertEqual(self.client.post("/info/batch", json={"items": muitos}).status_code, 400)
+        self.assertEqual(self.client.post("/info/batch", json={"items": [{"id": "../x"}]}).status_code, 400)
+        self.assertEqual(self.client.post("/info/batch", json={}).status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
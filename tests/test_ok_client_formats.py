@@ -1,7 +1,12 @@
+import threading
+import time
 import unittest
 from unittest.mock import patch
 
 from services import ok_client
+import yt_dlp
+
+from services.extraction import ExtractionFailedError, ExtractionService
 
 
 class OkClientFormatsTest(unittest.TestCase):
@@ -83,5 +88,103 @@ class OkClientFormatsTest(unittest.TestCase):
                 ok_client.extrair_link_download("123", format_id="forged")
 
 
+class OkClientExtractCacheTest(unittest.TestCase):
+    def setUp(self):
+        ok_client._extract_cache.clear()
+        self.addCleanup(ok_client._extract_cache.clear)
+        # Extração na própria thread, para o patch de _extrair_com_yt_dlp valer.
+        patcher = patch.object(ok_client, "extraction_service", ExtractionService(0, 0, 1, 1))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _info(self, expires_ms):
+        return {
+            "title": "Filme",
+            "formats": [{"format_id": "hd", "url": f"https://vd1.okcdn.ru/?expires={expires_ms}&sig=x"}],
+            "http_headers": {},
+            "thumbnails": ["grande"],
+        }
+
+    def test_follow_up_calls_reuse_the_extraction_until_the_urls_expire(self):
+        expires_ms = int((time.time() + 3 * 3600) * 1000)
+        with patch.object(ok_client, "_extrair_com_yt_dlp", return_value=self._info(expires_ms)) as extrair:
+            primeiro = ok_client._extract_video_info("123")
+            segundo = ok_client._extract_video_info("123")
+
+        extrair.assert_called_once_with("123")
+        self.assertEqual(segundo, primeiro)
+        self.assertNotIn("thumbnails", primeiro)
+        # URLs assinadas nunca vão para o cache compartilhado.
+        self.assertEqual(ok_client.extract_cache_stats()["backend"], "memory")
+        self.assertEqual(ok_client._ttl_extracao(primeiro), ok_client._extract_cache.ttl)
+
+        quase_expirando = self._info(int((time.time() + 600) * 1000))
+        self.assertAlmostEqual(
+            ok_client._ttl_extracao(quase_expirando), 600 - ok_client.EXTRACT_CACHE_MARGIN, delta=5
+        )
+
+    def test_concurrent_callers_share_one_extraction_and_pick_their_own_format(self):
+        info = {
+            "title": "Filme",
+            "formats": [
+                {"format_id": fmt, "url": f"https://cdn/{fmt}.mp4", "ext": "mp4", "height": altura}
+                for fmt, altura in (("hd", 720), ("sd-low", 480), ("sd-best", 480))
+            ],
+        }
+        liberar = threading.Event()
+        shared_before = ok_client._extract_flight.shared
+
+        def extrair_devagar(video_id):
+            liberar.wait(2)
+            return info
+
+        resultados = {}
+
+        def baixar(format_id):
+            resultados[format_id] = ok_client.extrair_link_download("123", format_id=format_id)["url"]
+
+        with patch.object(ok_client, "_extrair_com_yt_dlp", side_effect=extrair_devagar) as extrair:
+            threads = [threading.Thread(target=baixar, args=(fmt,)) for fmt in ("hd", "sd-low", "sd-best")]
+            for thread in threads:
+                thread.start()
+            deadline = time.monotonic() + 2
+            while ok_client._extract_flight.shared - shared_before < 2 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            liberar.set()
+            for thread in threads:
+                thread.join()
+
+        extrair.assert_called_once_with("123")
+        self.assertEqual(
+            resultados,
+            {"hd": "https://cdn/hd.mp4", "sd-low": "https://cdn/sd-low.mp4", "sd-best": "https://cdn/sd-best.mp4"},
+        )
+
+    def test_urls_about_to_expire_are_not_cached(self):
+        expires_ms = int((time.time() + 30) * 1000)
+        with patch.object(ok_client, "_extrair_com_yt_dlp", return_value=self._info(expires_ms)) as extrair:
+            ok_client._extract_video_info("123")
+            ok_client._extract_video_info("123")
+
+        self.assertEqual(extrair.call_count, 2)
+
+    def test_yt_dlp_errors_from_the_worker_mean_the_video_is_unavailable(self):
+        erro = yt_dlp.utils.DownloadError
+        nome = f"{erro.__module__}.{erro.__qualname__}"
+        falha = ExtractionFailedError("This video is private", nome)
+        with patch.object(ok_client.extraction_service, "run", side_effect=falha):
+            with self.assertRaisesRegex(ok_client.VideoUnavailableError, "private"):
+                ok_client._extract_video_info("123")
+
+        for falha in (
+            ExtractionFailedError("boom", "builtins.KeyError"),
+            ExtractionFailedError("Unable to download webpage: HTTP Error 503", nome),
+            erro("This video is not available in your region, it has been blocked"),
+        ):
+            with patch.object(ok_client.extraction_service, "run", side_effect=falha):
+                with self.assertRaises(ExtractionFailedError):
+                    ok_client._extract_video_info("123")
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,70 @@
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+from services import ok_client
+
+
+def _response(status=200, titles=("Filme",)):
+    response = MagicMock()
+    response.status_code = status
+    response.text = ""
+    response.json.return_value = {
+        "result": {
+            "videos": {
+                "totalCount": len(titles),
+                "list": [{"movie": {"id": str(i), "title": t, "duration": 60000}} for i, t in enumerate(titles)],
+            }
+        }
+    }
+    return response
+
+
+class OkClientSearchCacheTest(unittest.TestCase):
+    def setUp(self):
+        ok_client._search_cache.clear()  # pylint: disable=protected-access
+
+    def test_repeated_searches_are_served_from_cache(self):
+        with patch.object(ok_client.http_client, "post", return_value=_response()) as post:
+            first = ok_client.buscar_videos("Filme  Bom", 0)
+            first["videos"][0]["title"] = "alterado"
+            again = ok_client.buscar_videos("filme bom", 0)
+            other_page = ok_client.buscar_videos("filme bom", 20)
+
+        self.assertEqual(again["videos"][0]["title"], "Filme")
+        self.assertEqual(post.call_count, 2)
+        self.assertEqual(post.call_args_list[0].kwargs["json"]["parameters"]["searchQuery"], "Filme Bom")
+        self.assertEqual(other_page["totalCount"], 1)
+
+    def test_api_errors_are_not_cached(self):
+        with patch.object(ok_client.http_client, "post", side_effect=[_response(status=502), _response()]) as post:
+            self.assertEqual(ok_client.buscar_videos("x", 0)["videos"], [])
+            self.assertEqual(len(ok_client.buscar_videos("x", 0)["videos"]), 1)
+        self.assertEqual(post.call_count, 2)
+
+    def test_concurrent_identical_searches_share_one_request(self):
+        liberar = threading.Event()
+        chamadas = []
+
+        def post(*args, **kwargs):
+            chamadas.append(1)
+            liberar.wait(2)
+            return _response()
+
+        shared_before = ok_client.search_cache_stats()["shared"]
+        with patch.object(ok_client.http_client, "post", side_effect=post):
+            threads = [threading.Thread(target=ok_client.buscar_videos, args=("mesma", 0)) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            while ok_client.search_cache_stats()["shared"] < shared_before + 3 and threads[0].is_alive():
+                time.sleep(0.01)
+            liberar.set()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(len(chamadas), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
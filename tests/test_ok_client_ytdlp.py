@@ -0,0 +1,142 @@
+import json
+import os
+import stat
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from services import ok_client
+
+
+class CookieJarCacheTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+        self.source = self.dir / "okru_cookies.json"
+        self.cache = self.dir / "cache" / "cookies.txt"
+        for name, value in (("COOKIES_FILE", self.source), ("COOKIEFILE_CACHE", self.cache)):
+            patcher = patch.object(ok_client, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self._reset_state()
+        self.addCleanup(self._reset_state)
+
+    @staticmethod
+    def _reset_state():
+        ok_client._cookies_estado.update({"assinatura": None, "sha1": None, "jar": None})
+
+    def _write(self, value, mtime):
+        cookies = [
+            {"name": "sid", "value": value, "domain": ".ok.ru", "path": "/", "secure": True, "expiry": 2000000000},
+            {"name": "outro", "value": "x", "domain": ".example.com"},
+        ]
+        self.source.write_text(json.dumps(cookies), encoding="utf-8")
+        os.utime(self.source, (mtime, mtime))
+
+    def test_jar_is_converted_once_and_rebuilt_only_when_content_changes(self):
+        self._write("abc", 1_000_000)
+        with patch.object(ok_client.json, "loads", wraps=json.loads) as loads:
+            primeiro = ok_client._cookiejar_yt_dlp()
+            self.assertIs(ok_client._cookiejar_yt_dlp(), primeiro)
+
+            # Só o mtime mudou: o conteúdo é o mesmo e nada é convertido.
+            os.utime(self.source, (1_000_100, 1_000_100))
+            self.assertIs(ok_client._cookiejar_yt_dlp(), primeiro)
+            self.assertEqual(loads.call_count, 1)
+
+            self._write("novo", 1_000_200)
+            segundo = ok_client._cookiejar_yt_dlp()
+            self.assertEqual(loads.call_count, 2)
+
+        self.assertEqual([(c.name, c.value) for c in primeiro], [("sid", "abc")])
+        self.assertEqual([(c.name, c.value) for c in segundo], [("sid", "novo")])
+        self.assertEqual(os.listdir(self.cache.parent), ["cookies.txt"])
+
+    def test_converted_file_on_disk_is_reused_by_a_fresh_process(self):
+        self._write("abc", 1_000_000)
+        ok_client._cookiejar_yt_dlp()
+        self._reset_state()
+
+        with patch.object(ok_client.json, "loads") as loads:
+            jar = ok_client._cookiejar_yt_dlp()
+
+        loads.assert_not_called()
+        self.assertEqual([c.value for c in jar], ["abc"])
+
+    def test_converted_file_is_private_and_failed_conversions_are_retried(self):
+        self._write("abc", 1_000_000)
+        with patch.object(ok_client, "_gravar_atomico", side_effect=OSError("disco cheio")):
+            self.assertIsNone(ok_client._cookiejar_yt_dlp())
+
+        # Mesmo arquivo de origem: a falha anterior não impede nova conversão.
+        jar = ok_client._cookiejar_yt_dlp()
+
+        self.assertEqual([c.value for c in jar], ["abc"])
+        self.assertEqual(stat.S_IMODE(self.cache.stat().st_mode), 0o600)
+
+    def test_jar_readable_by_others_is_not_trusted(self):
+        self._write("abc", 1_000_000)
+        ok_client._cookiejar_yt_dlp()
+        self._reset_state()
+        os.chmod(self.cache, 0o644)
+
+        with patch.object(ok_client.json, "loads", wraps=json.loads) as loads:
+            ok_client._cookiejar_yt_dlp()
+
+        loads.assert_called_once()
+        self.assertEqual(stat.S_IMODE(self.cache.stat().st_mode), 0o600)
+
+    def test_missing_source_means_no_cookies(self):
+        self.assertIsNone(ok_client._cookiejar_yt_dlp())
+
+
+class YoutubeDLPoolTest(unittest.TestCase):
+    def setUp(self):
+        self._drain()
+        self.addCleanup(self._drain)
+        self.jar = object()
+        for name, value in (
+            ("_cookiejar_yt_dlp", lambda: self.jar),
+            ("_novo_youtube_dl", lambda jar: MagicMock(name="YoutubeDL")),
+            ("YDL_MAX_USES", 3),
+        ):
+            patcher = patch.object(ok_client, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    @staticmethod
+    def _drain():
+        while not ok_client._ydl_pool.empty():
+            ok_client._ydl_pool.get_nowait()
+
+    def _usar(self):
+        with ok_client._youtube_dl() as ydl:
+            return ydl
+
+    def test_instances_are_reused_and_recycled_after_max_uses(self):
+        usadas = [self._usar() for _ in range(4)]
+
+        self.assertIs(usadas[0], usadas[1])
+        self.assertIs(usadas[1], usadas[2])
+        self.assertIsNot(usadas[2], usadas[3])
+        usadas[0].close.assert_called_once()
+
+    def test_failed_extractions_and_new_cookies_discard_the_instance(self):
+        with self.assertRaises(RuntimeError):
+            with ok_client._youtube_dl() as quebrada:
+                raise RuntimeError("extractor falhou")
+        quebrada.close.assert_called_once()
+
+        antes = self._usar()
+        self.jar = object()
+        depois = self._usar()
+
+        self.assertIsNot(quebrada, antes)
+        self.assertIsNot(antes, depois)
+        antes.close.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
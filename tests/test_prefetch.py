@@ -0,0 +1,46 @@
+import threading
+import time
+import unittest
+
+from services.prefetch import Prefetcher
+
+
+def _wait_idle(prefetcher):
+    deadline = time.monotonic() + 2
+    while prefetcher.stats()["pending"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+class PrefetcherTest(unittest.TestCase):
+    def test_deduplicates_and_counts_used_and_wasted(self):
+        prefetcher = Prefetcher(workers=1, max_pending=4, ttl=0.05)
+        calls = []
+
+        self.assertTrue(prefetcher.schedule("a", lambda: calls.append("a")))
+        _wait_idle(prefetcher)
+        self.assertFalse(prefetcher.schedule("a", lambda: calls.append("a")))
+        self.assertTrue(prefetcher.claim("a"))
+        self.assertFalse(prefetcher.claim("a"))
+
+        prefetcher.schedule("b", lambda: calls.append("b"))
+        _wait_idle(prefetcher)
+        time.sleep(0.06)
+
+        self.assertEqual(calls, ["a", "b"])
+        stats = prefetcher.stats()
+        self.assertEqual((stats["used"], stats["wasted"], stats["deduplicated"]), (1, 1, 1))
+
+    def test_drops_work_when_the_queue_is_full(self):
+        prefetcher = Prefetcher(workers=1, max_pending=1)
+        release = threading.Event()
+
+        self.assertTrue(prefetcher.schedule("lenta", lambda: release.wait(2)))
+        self.assertFalse(prefetcher.schedule("outra", lambda: None))
+        release.set()
+        _wait_idle(prefetcher)
+
+        self.assertEqual(prefetcher.stats()["dropped"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
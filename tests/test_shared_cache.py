@@ -0,0 +1,80 @@
+import os
+import sqlite3
+import stat
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from utils.shared_cache import SQLiteBackend, TieredCache, private_cache_dir
+
+
+class TieredCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "cache.sqlite3")
+
+    def _worker(self, ttl=60):
+        # Cada instância simula um worker do gunicorn com seu próprio nível em memória.
+        return TieredCache("teste", maxsize=10, ttl=ttl, shared=SQLiteBackend(self.path))
+
+    def test_values_written_by_one_worker_are_seen_by_another(self):
+        a, b = self._worker(), self._worker()
+
+        a.set(("filme", 0), {"videos": [1, 2]})
+
+        self.assertEqual(b.get(("filme", 0)), {"videos": [1, 2]})
+        self.assertEqual(b.stats()["shared_hits"], 1)
+        self.assertEqual(b.get(("filme", 0)), {"videos": [1, 2]})
+        self.assertEqual(b.stats()["shared_hits"], 1)
+
+    def test_get_many_and_set_many_round_trip(self):
+        a, b = self._worker(), self._worker()
+        a.set_many({"x": 1, "y": 2})
+        b.set("z", 3)
+
+        self.assertEqual(b.get_many(["x", "y", "z", "w"]), {"x": 1, "y": 2, "z": 3})
+
+    def test_expired_and_cleared_entries_are_misses(self):
+        a, b = self._worker(ttl=0.05), self._worker()
+        a.set("curta", "valor")
+        time.sleep(0.06)
+        self.assertIsNone(b.get("curta"))
+
+        b.set("longa", "valor")
+        other_namespace = TieredCache("outro", maxsize=10, ttl=60, shared=SQLiteBackend(self.path))
+        other_namespace.set("longa", "fica")
+        b.clear()
+
+        self.assertIsNone(self._worker().get("longa"))
+        self.assertEqual(TieredCache("outro", 10, 60, shared=SQLiteBackend(self.path)).get("longa"), "fica")
+
+    def test_backend_failures_degrade_to_memory(self):
+        cache = TieredCache("teste", maxsize=10, ttl=60, shared=SQLiteBackend(os.path.join(self.tmp.name, "x", "y")))
+
+        cache.set("k", "v")
+
+        self.assertEqual(cache.get("k"), "v")
+        self.assertGreaterEqual(cache.stats()["shared_errors"], 1)
+
+    def test_values_are_stored_as_json(self):
+        a, b = self._worker(), self._worker()
+        a.set("pagina", ({"id": 1},), ttl=60)
+
+        with sqlite3.connect(self.path) as conn:
+            (raw,) = conn.execute("SELECT value FROM cache").fetchone()
+        self.assertEqual(bytes(raw), b'[{"id":1}]')
+        self.assertEqual(b.get("pagina"), [{"id": 1}])
+
+    def test_default_directory_is_private(self):
+        with patch.dict(os.environ, {"XDG_CACHE_HOME": self.tmp.name}):
+            os.makedirs(os.path.join(self.tmp.name, "ok_api_movie"), mode=0o755)
+            path = private_cache_dir()
+
+        self.assertEqual(path, os.path.join(self.tmp.name, "ok_api_movie"))
+        self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), 0o700)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,232 @@
+import unittest
+from contextlib import contextmanager
+from unittest.mock import MagicMock, patch
+
+from services import video_repository
+
+
+class VideoRepositoryTest(unittest.TestCase):
+    def setUp(self):
+        self.cursor = MagicMock()
+        conn = MagicMock()
+        conn.cursor.return_value.__enter__.return_value = self.cursor
+
+        @contextmanager
+        def fake_connection():
+            yield conn
+
+        self.conn_patch = patch.object(video_repository, "connection", fake_connection)
+        self.conn_patch.start()
+        self.geracao_patch = patch.object(video_repository, "geracao_catalogo", return_value=None)
+        self.geracao = self.geracao_patch.start()
+        video_repository._page_cache.clear()  # pylint: disable=protected-access
+
+    def tearDown(self):
+        self.geracao_patch.stop()
+        self.conn_patch.stop()
+
+    def test_filters_orders_and_pages_in_one_statement(self):
+        self.cursor.fetchall.return_value = [
+            (2, "Filme B", "01:30:00", "//i.mycdn.me/b.jpg", 5400),
+            (1, "Filme A", "01:35:00", "", 5700),
+        ]
+
+        result = video_repository.buscar_videos_bd(
+            "Filme Dois", offset=40, limit=1, faixa="91-120", ordem="tempo_desc"
+        )
+
+        self.assertIsNone(result["totalCount"])
+        self.assertEqual(
+            result["videos"],
+            [
+                {
+                    "id": 2,
+                    "title": "Filme B",
+                    "duration": "01:30:00",
+                    "thumbnail": "https://i.mycdn.me/b.jpg",
+                    "likes": 0,
+                    "views": None,
+                }
+            ],
+        )
+        self.assertIsNotNone(result["next_cursor"])
+        self.cursor.execute.assert_called_once()
+        sql, params = self.cursor.execute.call_args.args
+        self.assertNotIn("COUNT", sql)
+        self.assertIn("ORDER BY duracao_seg DESC NULLS LAST, id DESC", sql)
+        self.assertEqual(params, ("Filme", "Dois", 5460, 7259, 2, 40))
+
+    def test_counts_exactly_up_to_the_limit_and_caches_the_result(self):
+        self.cursor.fetchall.return_value = []
+        self.cursor.fetchone.return_value = (12,)
+        video_repository._count_cache.clear()  # pylint: disable=protected-access
+
+        first = video_repository.buscar_videos_bd("Filme", contar=True)
+        again = video_repository.contar_videos_bd("  filme ")
+
+        self.assertEqual((first["totalCount"], first["approximate"]), (12, False))
+        self.assertEqual(again, (12, False))
+        count_sql, params = self.cursor.execute.call_args_list[1].args
+        self.assertIn("LIMIT %s) limitado", count_sql)
+        self.assertEqual(params, ("Filme", video_repository.COUNT_EXACT_LIMIT + 1))
+        self.assertEqual(self.cursor.execute.call_count, 2)
+
+    def test_broad_queries_use_the_planner_estimate(self):
+        video_repository._count_cache.clear()  # pylint: disable=protected-access
+        self.cursor.fetchone.side_effect = [
+            (video_repository.COUNT_EXACT_LIMIT + 1,),
+            ([{"Plan": {"Plan Rows": 250000}}],),
+        ]
+
+        total = video_repository.contar_videos_bd("a", faixa="0-20")
+
+        self.assertEqual(total, (250000, True))
+        self.assertIn("EXPLAIN (FORMAT JSON)", self.cursor.execute.call_args.args[0])
+
+    def test_similarity_order_uses_the_trigram_expression(self):
+        self.cursor.fetchall.return_value = []
+
+        video_repository.buscar_videos_bd("ação  100%", ordem="similaridade")
+
+        sql, params = self.cursor.execute.call_args.args
+        self.assertIn("lower(f_unaccent(nome)) LIKE '%%' || lower(f_unaccent(%s)) || '%%'", sql)
+        self.assertIn(
+            "ORDER BY similarity(lower(f_unaccent(nome)), lower(f_unaccent(%s)))::float8 DESC, id DESC", sql
+        )
+        self.assertEqual(params, ("ação 100%", "ação", "100\\%", "ação 100%", 21, 0))
+
+    def test_relevance_order_uses_full_text_search(self):
+        self.cursor.fetchall.return_value = []
+
+        video_repository.buscar_videos_bd('"de volta" -futuro', ordem="relevancia")
+
+        sql, params = self.cursor.execute.call_args.args
+        self.assertIn("nome_tsv @@ websearch_to_tsquery('simple', f_unaccent(%s))", sql)
+        self.assertNotIn("LIKE", sql)
+        self.assertIn(
+            "ORDER BY ts_rank(nome_tsv, websearch_to_tsquery('simple', f_unaccent(%s)))::float8 DESC, id DESC", sql
+        )
+        self.assertEqual(params, ('"de volta" -futuro',) * 3 + (21, 0))
+
+    def test_unknown_order_falls_back_to_name(self):
+        self.cursor.fetchall.return_value = []
+
+        result = video_repository.buscar_videos_bd("", ordem="inexistente")
+
+        self.assertEqual(
+            result, {"videos": [], "totalCount": None, "approximate": False, "next_cursor": None, "seed": None}
+        )
+        sql, params = self.cursor.execute.call_args.args
+        self.assertIn('ORDER BY LOWER(nome) COLLATE "C" ASC, id ASC', sql)
+        self.assertEqual(params, (21, 0))
+
+    def test_next_page_is_fetched_by_keyset_without_counting(self):
+        self.cursor.fetchall.return_value = [
+            (7, "Beta", "", "", "beta"),
+            (9, "Gama", "", "", "gama"),
+        ]
+        first = video_repository.buscar_videos_bd("a", limit=1, ordem="nome_asc")
+        self.assertEqual([v["id"] for v in first["videos"]], [7])
+
+        self.cursor.reset_mock()
+        self.cursor.fetchall.return_value = [(9, "Gama", "", "", "gama")]
+        second = video_repository.buscar_videos_bd(
+            "a", offset=999, limit=1, ordem="nome_asc", cursor=first["next_cursor"]
+        )
+
+        self.assertEqual([v["id"] for v in second["videos"]], [9])
+        self.assertIsNone(second["totalCount"])
+        self.assertIsNone(second["next_cursor"])
+        sql, params = self.cursor.execute.call_args.args
+        self.assertNotIn("COUNT(*)", sql)
+        self.assertIn('(LOWER(nome) COLLATE "C", id) > (%s, %s)', sql)
+        self.assertEqual(params, ("a", "beta", 7, 2, 0))
+
+    def test_keyset_keeps_unknown_durations_last(self):
+        cursor = video_repository._encode_cursor("tempo_asc", 600, 4)  # pylint: disable=protected-access
+        self.cursor.fetchall.return_value = []
+
+        video_repository.buscar_videos_bd("", ordem="tempo_asc", cursor=cursor)
+
+        sql, params = self.cursor.execute.call_args.args
+        self.assertIn("(duracao_seg > %s OR (duracao_seg = %s AND id > %s) OR duracao_seg IS NULL)", sql)
+        self.assertEqual(params, (600, 600, 4, 21, 0))
+
+    def test_random_order_is_seeded_and_continues_through_the_cursor(self):
+        self.cursor.fetchall.return_value = [(5, "A", "", "", 111), (3, "B", "", "", 222)]
+
+        first = video_repository.buscar_videos_bd("", limit=1, ordem="random", seed="42")
+
+        self.assertEqual(first["seed"], 42)
+        sql, params = self.cursor.execute.call_args.args
+        self.assertIn("ORDER BY hashtextextended(id::text, %s) ASC, id ASC", sql)
+        self.assertNotIn("random()", sql)
+        self.assertEqual(params, (42, 42, 2, 0))
+
+        self.cursor.fetchall.return_value = []
+        second = video_repository.buscar_videos_bd("", ordem="random", cursor=first["next_cursor"])
+
+        self.assertEqual(second["seed"], 42)
+        sql, params = self.cursor.execute.call_args.args
+        self.assertIn("(hashtextextended(id::text, %s), id) > (%s, %s)", sql)
+        self.assertEqual(params, (42, 42, 111, 5, 42, 21, 0))
+
+    def test_pages_are_cached_until_the_catalog_generation_changes(self):
+        self.geracao.return_value = 7
+        self.cursor.fetchall.return_value = [(1, "Filme", "", "", "filme")]
+
+        first = video_repository.buscar_videos_bd("Filme", ordem="nome_asc")
+        first["videos"][0]["title"] = "alterado"
+        again = video_repository.buscar_videos_bd("  filme ", ordem="nome_asc")
+
+        self.assertEqual(again["videos"][0]["title"], "Filme")
+        self.assertEqual(self.cursor.execute.call_count, 1)
+
+        self.geracao.return_value = 8
+        video_repository.buscar_videos_bd("filme", ordem="nome_asc")
+        self.assertEqual(self.cursor.execute.call_count, 2)
+
+    def test_unseeded_random_pages_are_not_cached(self):
+        self.geracao.return_value = 7
+        self.cursor.fetchall.return_value = []
+
+        video_repository.buscar_videos_bd("", ordem="random")
+        video_repository.buscar_videos_bd("", ordem="random")
+
+        self.assertEqual(self.cursor.execute.call_count, 2)
+        self.geracao.assert_not_called()
+
+    def test_rejects_cursor_from_another_order(self):
+        cursor = video_repository._encode_cursor("nome_desc", "x", 1)  # pylint: disable=protected-access
+        with self.assertRaises(video_repository.InvalidCursorError):
+            video_repository.buscar_videos_bd("", ordem="nome_asc", cursor=cursor)
+        with self.assertRaises(video_repository.InvalidCursorError):
+            video_repository.buscar_videos_bd("", ordem="nome_asc", cursor="@@@")
+
+    def test_rejects_cursor_key_of_the_wrong_type(self):
+        encode = video_repository._encode_cursor  # pylint: disable=protected-access
+        invalidos = [
+            ("nome_asc", "", encode("nome_asc", 5, 1)),
+            ("nome_desc", "", encode("nome_desc", None, 1)),
+            ("tempo_asc", "", encode("tempo_asc", "600", 1)),
+            ("random", "", encode("random", 1.5, 1, 7)),
+            ("relevancia", "matrix", encode("relevancia", "0.5", 1)),
+            ("similaridade", "matrix", encode("similaridade", True, 1)),
+        ]
+        for ordem, query, cursor in invalidos:
+            with self.subTest(ordem=ordem), self.assertRaises(video_repository.InvalidCursorError):
+                video_repository.validar_cursor(cursor, query, ordem)
+
+        validos = [
+            ("nome_asc", "", encode("nome_asc", "matrix", 1)),
+            ("tempo_desc", "", encode("tempo_desc", None, 1)),
+            ("random", "", encode("random", -42, 1, 7)),
+            ("similaridade", "matrix", encode("similaridade", 0.5, 1)),
+        ]
+        for ordem, query, cursor in validos:
+            with self.subTest(ordem=ordem):
+                self.assertEqual(video_repository.validar_cursor(cursor, query, ordem)["i"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
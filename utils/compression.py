@@ -0,0 +1,104 @@
+import gzip
+import os
+
+from flask import Flask, request
+
+from utils.cache import TTLCache
+
+try:  # Opcional: com o pacote `brotli` instalado, br é preferido ao gzip.
+    import brotli
+except ImportError:  # pragma: no cover - depende do ambiente
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = frozenset(
+    {
+        "application/json",
+        "application/javascript",
+        "application/x-ndjson",
+        "image/svg+xml",
+        "text/css",
+        "text/html",
+        "text/javascript",
+        "text/plain",
+    }
+)
+MIN_SIZE = 512
+GZIP_LEVEL = int(os.environ.get("GZIP_LEVEL") or 6)
+BROTLI_QUALITY = int(os.environ.get("BROTLI_QUALITY") or 5)
+
+# Arquivos estáticos são comprimidos uma vez por versão (ETag) e codificação.
+_static_cache = TTLCache(maxsize=128, ttl=24 * 3600)
+
+
+def _accepted(header: str) -> set:
+    aceitas = set()
+    for parte in (header or "").split(","):
+        nome, _, params = parte.strip().partition(";")
+        if params.strip().replace(" ", "") in {"q=0", "q=0.0", "q=0.00", "q=0.000"}:
+            continue
+        if nome:
+            aceitas.add(nome.strip().lower())
+    return aceitas
+
+
+def choose_encoding(accept_encoding: str) -> str | None:
+    aceitas = _accepted(accept_encoding)
+    if brotli is not None and "br" in aceitas:
+        return "br"
+    if "gzip" in aceitas:
+        return "gzip"
+    return None
+
+
+def _compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def compress_response(response):
+    """
+    Comprime a resposta com br ou gzip conforme o Accept-Encoding, se o tipo
+    for textual e o corpo valer a pena. Respostas em streaming (geradores) não
+    são tocadas; arquivos estáticos são lidos e comprimidos com cache.
+    """
+    response.vary.add("Accept-Encoding")
+    if (
+        response.status_code != 200
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+        or "Content-Encoding" in response.headers
+        or (response.is_streamed and not response.direct_passthrough)
+    ):
+        return response
+    encoding = choose_encoding(request.headers.get("Accept-Encoding", ""))
+    if encoding is None:
+        return response
+
+    etag, _ = response.get_etag()
+    static_key = (request.path, etag, encoding) if response.direct_passthrough and etag else None
+    body = _static_cache.get(static_key) if static_key else None
+    if body is None:
+        response.direct_passthrough = False
+        data = response.get_data()
+        if len(data) < MIN_SIZE:
+            return response
+        body = _compress(data, encoding)
+        if static_key:
+            _static_cache.set(static_key, body)
+    else:
+        # Já comprimido: o arquivo aberto pelo send_file não será lido.
+        close = getattr(response.response, "close", None)
+        if close:
+            close()
+        response.direct_passthrough = False
+
+    response.set_data(body)
+    response.headers["Content-Encoding"] = encoding
+    if etag:
+        # A representação comprimida não é idêntica byte a byte à original.
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_app(app: Flask) -> None:
+    app.after_request(compress_response)
@@ -0,0 +1,28 @@
+import os
+
+
+def _positive_int_env(name: str, default: int) -> int:
+    try:
+        return max(1, int((os.environ.get(name) or str(default)).strip()))
+    except ValueError:
+        return default
+
+
+def gevent_mode() -> bool:
+    """O gunicorn roda com GUNICORN_WORKER_CLASS=gevent (ver gunicorn.conf.py)."""
+    return (os.environ.get("GUNICORN_WORKER_CLASS") or "").strip().lower() == "gevent"
+
+
+def upstream_limit(name: str, gthread_default: int) -> int:
+    """
+    Limite de chamadas simultâneas a serviços externos lido de `name`.
+
+    Sem a variável, vale `gthread_default` no modo gthread. No modo gevent as
+    threads dos pools são greenlets baratas e o padrão sobe para
+    UPSTREAM_CONCURRENCY (padrão: 256); senão as GUNICORN_WORKER_CONNECTIONS
+    requisições em andamento ficariam na fila de pools pequenos.
+    """
+    default = gthread_default
+    if gevent_mode():
+        default = max(gthread_default, _positive_int_env("UPSTREAM_CONCURRENCY", 256))
+    return _positive_int_env(name, default)
@@ -1,24 +1,25 @@
 from typing import Optional
 
 
-def tempo_para_minutos(txt: Optional[str]) -> Optional[int]:
+def tempo_para_segundos(txt: Optional[str]) -> Optional[int]:
     """
-    Converte strings como '01:28:12', '14:16' ou '00:01' em minutos inteiros.
-    Retorna None caso o formato seja inválido.
+    Converte strings como '01:28:12', '14:16' ou '90' em segundos inteiros.
+    Um número isolado é lido em minutos. Retorna None caso o formato seja
+    inválido ou o valor não caiba em um INTEGER do PostgreSQL.
     """
-    if not txt:
-        return None
-    partes = txt.split(":")
+    partes = (txt or "").split(":")
     try:
         if len(partes) == 3:
-            h, m, _ = map(int, partes)
-            return h * 60 + m
-        if len(partes) == 2:
-            m, _ = map(int, partes)
-            return m
-        return int(partes[0])
+            h, m, s = map(int, partes)
+            total = h * 3600 + m * 60 + s
+        elif len(partes) == 2:
+            m, s = map(int, partes)
+            total = m * 60 + s
+        else:
+            total = int(partes[0]) * 60
     except ValueError:
         return None
+    return total if 0 <= total < 2**31 else None
 
 
 def normalize_image_url(url: Optional[str]) -> str:
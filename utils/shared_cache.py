@@ -0,0 +1,276 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Hashable, Iterable, Optional, Tuple
+
+from utils.cache import TTLCache
+
+try:  # Opcional: só necessário com CACHE_BACKEND=redis.
+    import redis
+except ImportError:  # pragma: no cover - depende do ambiente
+    redis = None
+
+_MISSING = object()
+
+
+def _dumps(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _loads(raw: bytes) -> Any:
+    return json.loads(raw)
+
+
+def private_cache_dir() -> str:
+    """
+    Diretório de cache acessível só ao usuário do processo
+    ($XDG_CACHE_HOME/ok_api_movie, ou ~/.cache/ok_api_movie), com permissão
+    0700. Recusa um diretório de outro usuário.
+    """
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    path = os.path.join(base, "ok_api_movie")
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    info = os.stat(path)
+    if hasattr(os, "getuid") and info.st_uid != os.getuid():
+        raise PermissionError(f"{path} pertence a outro usuário")
+    if info.st_mode & 0o077:
+        os.chmod(path, 0o700)
+    return path
+
+
+class SQLiteBackend:
+    """
+    Cache em arquivo SQLite (modo WAL), compartilhado pelos processos da
+    mesma máquina e preservado entre reinícios. Valores são serializados em
+    JSON (tuplas voltam como listas); a expiração usa o relógio de parede.
+    """
+
+    name = "sqlite"
+    PURGE_EVERY = 500
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL NOT NULL)"
+            )
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Tuple[Any, float]]:
+        keys = list(keys)
+        found: Dict[str, Tuple[Any, float]] = {}
+        now = time.time()
+        for start in range(0, len(keys), 500):
+            chunk = keys[start : start + 500]
+            rows = self._conn().execute(
+                f"SELECT key, value, expires FROM cache WHERE key IN ({','.join('?' * len(chunk))}) AND expires > ?",
+                (*chunk, now),
+            )
+            for key, value, expires in rows:
+                found[key] = (_loads(value), expires)
+        return found
+
+    def set_many(self, items: Dict[str, Any], ttl: float) -> None:
+        expires = time.time() + ttl
+        rows = [(key, _dumps(value), expires) for key, value in items.items()]
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany("INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)", rows)
+            self._writes += len(rows)
+            if self._writes >= self.PURGE_EVERY:
+                self._writes = 0
+                conn.execute("DELETE FROM cache WHERE expires <= ?", (time.time(),))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def delete(self, key: str) -> None:
+        self._conn().execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self, prefix: str) -> None:
+        self._conn().execute("DELETE FROM cache WHERE substr(key, 1, ?) = ?", (len(prefix), prefix))
+
+
+class RedisBackend:
+    """
+    Cache em um servidor compatível com o protocolo Redis (Redis, Valkey,
+    KeyDB). Valores são serializados em JSON, como no SQLiteBackend.
+    """
+
+    name = "redis"
+
+    def __init__(self, url: str):
+        if redis is None:
+            raise RuntimeError("CACHE_BACKEND=redis requer o pacote 'redis'.")
+        self._client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Tuple[Any, float]]:
+        keys = list(keys)
+        if not keys:
+            return {}
+        pipe = self._client.pipeline(transaction=False)
+        for key in keys:
+            pipe.get(key)
+            pipe.pttl(key)
+        values = pipe.execute()
+        now = time.time()
+        found = {}
+        for index, key in enumerate(keys):
+            value, pttl = values[2 * index], values[2 * index + 1]
+            if value is not None and pttl and pttl > 0:
+                found[key] = (_loads(value), now + pttl / 1000)
+        return found
+
+    def set_many(self, items: Dict[str, Any], ttl: float) -> None:
+        pipe = self._client.pipeline(transaction=False)
+        for key, value in items.items():
+            pipe.set(key, _dumps(value), px=max(1, int(ttl * 1000)))
+        pipe.execute()
+
+    def delete(self, key: str) -> None:
+        self._client.delete(key)
+
+    def clear(self, prefix: str) -> None:
+        for key in self._client.scan_iter(match=f"{prefix}*", count=500):
+            self._client.delete(key)
+
+
+class TieredCache:
+    """
+    Cache em dois níveis com a mesma interface de TTLCache: um LRU em memória
+    na frente e, opcionalmente, um backend compartilhado entre processos.
+
+    Falhas do backend compartilhado são registradas e tratadas como ausência
+    do valor; nunca interrompem a requisição. Com backend, os valores precisam
+    ser serializáveis em JSON, e tuplas lidas dele chegam como listas.
+    """
+
+    def __init__(self, namespace: str, maxsize: int, ttl: float, shared=None):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.local = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.shared = shared
+        self.shared_hits = 0
+        self.shared_errors = 0
+        self._lock = threading.Lock()
+
+    def _count(self, name: str, delta: int = 1) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + delta)
+
+    def _key(self, key: Hashable) -> str:
+        return f"{self.namespace}:{json.dumps(key, default=str, ensure_ascii=False, separators=(',', ':'))}"
+
+    def _shared_call(self, method: str, *args, default=None):
+        try:
+            return getattr(self.shared, method)(*args)
+        except Exception as exc:  # pylint: disable=broad-except
+            self._count("shared_errors")
+            logging.warning("cache %s: backend %s falhou em %s: %s", self.namespace, self.shared.name, method, exc)
+            return default
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        return self.get_many([key]).get(key, default)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.local or key in self.get_many([key])
+
+    def get_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, Any]:
+        keys = list(keys)
+        found = self.local.get_many(keys)
+        missing = {self._key(key): key for key in keys if key not in found}
+        if self.shared is None or not missing:
+            return found
+        now = time.time()
+        for shared_key, (value, expires) in self._shared_call("get_many", list(missing), default={}).items():
+            key = missing[shared_key]
+            found[key] = value
+            self._count("shared_hits")
+            self.local.set(key, value, ttl=min(self.ttl, max(0.0, expires - now)))
+        return found
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        self.set_many({key: value}, ttl)
+
+    def set_many(self, items: Dict[Hashable, Any], ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        self.local.set_many(items, ttl)
+        if self.shared is not None and items:
+            self._shared_call("set_many", {self._key(key): value for key, value in items.items()}, ttl)
+
+    def delete(self, key: Hashable) -> None:
+        self.local.delete(key)
+        if self.shared is not None:
+            self._shared_call("delete", self._key(key))
+
+    def clear(self) -> None:
+        self.local.clear()
+        if self.shared is not None:
+            self._shared_call("clear", f"{self.namespace}:")
+
+    @property
+    def hits(self) -> int:
+        return self.local.hits + self.shared_hits
+
+    @property
+    def misses(self) -> int:
+        return self.local.misses - self.shared_hits
+
+    def stats(self) -> dict:
+        return {
+            **self.local.stats(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "backend": self.shared.name if self.shared is not None else "memory",
+            "shared_hits": self.shared_hits,
+            "shared_errors": self.shared_errors,
+        }
+
+
+_backend: Any = _MISSING
+_backend_lock = threading.Lock()
+
+
+def shared_backend():
+    """
+    Backend compartilhado escolhido por CACHE_BACKEND: "sqlite"
+    (CACHE_SQLITE_PATH, por padrão em `private_cache_dir()`), "redis"
+    (CACHE_REDIS_URL) ou "memory" (padrão, sem segundo nível).
+    """
+    global _backend
+    if _backend is _MISSING:
+        with _backend_lock:
+            if _backend is _MISSING:
+                kind = (os.environ.get("CACHE_BACKEND") or "memory").strip().lower()
+                try:
+                    if kind == "sqlite":
+                        path = os.environ.get("CACHE_SQLITE_PATH") or os.path.join(
+                            private_cache_dir(), "cache.sqlite3"
+                        )
+                        _backend = SQLiteBackend(path)
+                    elif kind == "redis":
+                        _backend = RedisBackend(os.environ.get("CACHE_REDIS_URL") or "redis://localhost:6379/0")
+                    else:
+                        _backend = None
+                except Exception as exc:  # pylint: disable=broad-except
+                    logging.warning("CACHE_BACKEND=%s indisponível (%s); usando só memória.", kind, exc)
+                    _backend = None
+    return _backend
+
+
+def make_cache(namespace: str, maxsize: int, ttl: float) -> TieredCache:
+    return TieredCache(namespace, maxsize, ttl, shared=shared_backend())